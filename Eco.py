@@ -1,742 +1,1261 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
+from functools import lru_cache
 import warnings
+import hashlib
+import shutil
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import parse_qs, unquote, urlsplit
 warnings.filterwarnings('ignore')
 
+# Spécification des indicateurs simulés (dans l'ordre des colonnes du DataFrame)
+# - base: "population" (population_base), "budget" (budget_base converti en devise locale)
+#   ou "constante" (valeur brute), multipliée par "part"
+# - croissance: taux annuel (ou par type de commune), appliqué à partir de "depuis"
+#   (None = première année de la série)
+# - evenements: multiplicateurs ponctuels par année
+# - specialite: (spécialité, multiplicateur si présente, multiplicateur sinon)
+# - volatilite: écart-type du bruit multiplicatif N(1, volatilite)
+INDICATEURS_SIMULES = [
+    # Données démographiques (croissance africaine très forte)
+    {"colonne": "Population", "base": "population", "part": 1.0,
+     "croissance": {"megapole": 0.045, "capitale": 0.042, "rurale": 0.035, "default": 0.040},
+     "volatilite": 0.0},
+    {"colonne": "Menages", "base": "population", "part": 1 / 5.5,  # Taille des ménages plus grande
+     "croissance": 0.035, "volatilite": 0.0},
+
+    # Recettes communales en devise locale
+    {"colonne": "Recettes_Totales", "base": "budget", "part": 1.0,
+     "croissance": {"economique": 0.065, "miniere": 0.072, "rurale": 0.048, "default": 0.058},
+     "volatilite": 0.12},
+    {"colonne": "Impots_Locaux", "base": "budget", "part": 0.25, "croissance": 0.045, "volatilite": 0.15},
+    {"colonne": "Subventions_Etat", "base": "budget", "part": 0.45, "croissance": 0.015, "depuis": 2010,
+     "volatilite": 0.10},
+    {"colonne": "Aide_Internationale", "base": "budget", "part": 0.15, "croissance": 0.025,
+     "evenements": {2005: 1.8, 2010: 1.8, 2015: 1.8, 2020: 1.8, 2008: 0.7, 2014: 0.7, 2022: 0.7},
+     "volatilite": 0.25},
+    {"colonne": "Autres_Recettes", "base": "budget", "part": 0.15, "croissance": 0.038, "volatilite": 0.18},
+
+    # Dépenses communales en devise locale
+    {"colonne": "Depenses_Totales", "base": "budget", "part": 0.95, "croissance": 0.052, "volatilite": 0.09},
+    {"colonne": "Fonctionnement", "base": "budget", "part": 0.70, "croissance": 0.048, "volatilite": 0.08},
+    {"colonne": "Investissement", "base": "budget", "part": 0.25, "croissance": 0.040,
+     "evenements": {2005: 2.0, 2010: 2.0, 2015: 2.0, 2020: 2.0, 2008: 0.6, 2014: 0.6, 2021: 0.6},
+     "volatilite": 0.22},
+    {"colonne": "Charge_Dette", "base": "budget", "part": 0.08, "croissance": 0.012, "depuis": 2005,
+     "volatilite": 0.15},
+    {"colonne": "Personnel", "base": "budget", "part": 0.50, "croissance": 0.045, "volatilite": 0.07},
+
+    # Indicateurs financiers
+    {"colonne": "Epargne_Brute", "base": "budget", "part": 0.02, "croissance": 0.006, "depuis": 2010,
+     "volatilite": 0.20},
+    {"colonne": "Dette_Totale", "base": "budget", "part": 0.90, "croissance": 0.0,
+     "evenements": {2005: 1.35, 2010: 1.35, 2015: 1.35, 2020: 1.35, 2008: 0.85, 2014: 0.85, 2021: 0.85},
+     "volatilite": 0.12},
+    {"colonne": "Taux_Endettement", "base": "constante", "part": 0.82, "croissance": -0.008, "depuis": 2010,
+     "volatilite": 0.09},
+    {"colonne": "Taux_Fiscalite", "base": "constante", "part": 0.65, "croissance": 0.004, "depuis": 2010,
+     "volatilite": 0.05},
+
+    # Investissements spécifiques adaptés à l'Afrique
+    {"colonne": "Investissement_Agriculture", "base": "budget", "part": 0.12, "croissance": 0.040,
+     "evenements": {2005: 2.5, 2010: 2.5, 2015: 2.5, 2020: 2.5},
+     "specialite": ("agriculture", 1.8, 0.9), "volatilite": 0.20},
+    {"colonne": "Investissement_Infrastructures", "base": "budget", "part": 0.15, "croissance": 0.045,
+     "evenements": {2006: 2.2, 2012: 2.2, 2018: 2.2, 2023: 2.2},
+     "specialite": ("infrastructures", 1.6, 1.2), "volatilite": 0.18},
+    {"colonne": "Investissement_Sante", "base": "budget", "part": 0.08, "croissance": 0.038,
+     "evenements": {2008: 2.0, 2014: 2.0, 2020: 2.0},
+     "specialite": ("sante", 1.7, 1.0), "volatilite": 0.22},
+    {"colonne": "Investissement_Education", "base": "budget", "part": 0.10, "croissance": 0.042,
+     "evenements": {2007: 1.9, 2013: 1.9, 2019: 1.9},
+     "specialite": ("education", 1.6, 1.1), "volatilite": 0.19},
+    {"colonne": "Investissement_Eau", "base": "budget", "part": 0.06, "croissance": 0.035,
+     "evenements": {2009: 2.3, 2015: 2.3, 2021: 2.3}, "volatilite": 0.21},
+    {"colonne": "Investissement_Energie", "base": "budget", "part": 0.07, "croissance": 0.040,
+     "evenements": {2010: 2.1, 2016: 2.1, 2022: 2.1},
+     "specialite": ("energie", 1.5, 1.0), "volatilite": 0.20},
+    {"colonne": "Investissement_Mines", "base": "budget", "part": 0.05, "croissance": 0.050,
+     "evenements": {2008: 3.0, 2014: 3.0, 2020: 3.0},
+     "specialite": ("mines", 2.5, 0.3), "volatilite": 0.35},  # Extrême volatilité
+    {"colonne": "Investissement_Tourisme", "base": "budget", "part": 0.04, "croissance": 0.036,
+     "evenements": {2007: 2.0, 2013: 2.0, 2019: 2.0, 2024: 2.0},
+     "specialite": ("tourisme", 2.0, 0.7), "volatilite": 0.24},
+]
+
+COLONNES_INDICATEURS = [spec["colonne"] for spec in INDICATEURS_SIMULES]
+# Montants exprimés en devise locale (convertis depuis l'euro par _convert_to_local_currency)
+COLONNES_MONTANTS = [spec["colonne"] for spec in INDICATEURS_SIMULES if spec["base"] == "budget"]
+
+# Registre des communes et devises (voir CommuneRegistry)
+REGISTRE_DEFAUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'communes.json')
+
+# Profils de rendu des figures: taille en pouces, résolution, échelle des textes et mise en page
+# (marges fixes, ou None pour tight_layout et un recadrage serré, qui coûtent chacun un tracé de plus)
+PROFILS_RENDU = {
+    "thumbnail": {"figsize": (8, 9.6), "dpi": 50, "texte": 0.45, 
+                  "marges": {"left": 0.07, "right": 0.93, "bottom": 0.04, "top": 0.92, "wspace": 0.35, "hspace": 0.4}},
+    "screen": {"figsize": (20, 24), "dpi": 100, "texte": 1.0, "marges": None},
+    "print": {"figsize": (20, 24), "dpi": 300, "texte": 1.0, "marges": None},
+}
+FORMATS_FIGURE = ("png", "svg", "pdf")
+
+# Formats de sortie des données (extension de fichier)
+FORMATS_DONNEES = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+EXTENSIONS_COMPRESSION_CSV = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "zstd": ".zst", "zip": ".zip"}
+COMPRESSIONS_DONNEES = {"csv": tuple(EXTENSIONS_COMPRESSION_CSV), 
+                        "parquet": ("snappy", "gzip", "brotli", "lz4", "zstd"), 
+                        "feather": ("lz4", "zstd", "uncompressed")}
+
+# Sous-flux aléatoires: trajectoire unique et ensembles Monte Carlo (par blocs de réplicats)
+FLUX_TRAJECTOIRE = 0
+FLUX_ENSEMBLE = 1
+FLUX_SAISONNALITE = 2
+TAILLE_BLOC_REPLICATS = 1024
+# Écart relatif en deçà duquel une estimation répétée est tenue pour exacte (bruit d'arrondi)
+TOLERANCE_ESTIMATION_EXACTE = 1e-12
+
+# Échantillonnage des bruits des ensembles: Monte Carlo simple, paires antithétiques,
+# hypercube latin et Sobol brouillé (ces deux derniers nécessitent scipy)
+METHODES_ECHANTILLONNAGE = ("mc", "antithetique", "lhs", "sobol")
+
+# Résolutions temporelles: nombre de périodes par an
+RESOLUTIONS = {"annuel": 1, "trimestriel": 4, "mensuel": 12}
+
+# Stocks: valeur de fin d'année, non répartie entre les périodes
+COLONNES_STOCKS = ["Dette_Totale"]
+COLONNES_FLUX = [column for column in COLONNES_MONTANTS if column not in COLONNES_STOCKS]
+
+# Profils saisonniers mensuels (poids relatifs, janvier à décembre); profil plat par défaut
+SAISONNALITE = {
+    # Recouvrement des impôts locaux concentré sur les échéances du premier semestre
+    "Impots_Locaux": [1.0, 1.6, 1.8, 1.4, 0.9, 0.8, 0.8, 0.7, 0.8, 0.8, 0.7, 0.7],
+    # Dotations de l'État versées par tranches trimestrielles
+    "Subventions_Etat": [0.2, 0.2, 2.6, 0.2, 0.2, 2.6, 0.2, 0.2, 2.6, 0.2, 0.2, 2.6],
+    # Décaissements des bailleurs tardifs dans l'exercice
+    "Aide_Internationale": [0.3, 0.3, 0.5, 0.6, 0.8, 1.2, 0.9, 0.8, 1.4, 1.5, 1.7, 2.0],
+    "Recettes_Totales": [0.8, 1.0, 1.3, 1.0, 0.9, 1.1, 0.9, 0.8, 1.1, 1.0, 1.0, 1.1],
+    "Personnel": [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.5],
+    "Charge_Dette": [0.2, 0.2, 0.2, 0.2, 0.2, 2.5, 0.2, 0.2, 0.2, 0.2, 0.2, 2.5],
+    # Exécution des investissements concentrée en fin d'exercice
+    "Investissement": [0.4, 0.5, 0.6, 0.8, 0.9, 1.0, 1.0, 0.9, 1.2, 1.4, 1.6, 1.7],
+    "Depenses_Totales": [0.7, 0.8, 0.9, 1.0, 1.0, 1.1, 1.0, 0.9, 1.0, 1.1, 1.1, 1.4],
+}
+VOLATILITE_SAISONNIERE = 0.10
+
+# Chocs historiques du contexte africain: (année début, année fin, colonne, multiplicateur)
+# Une borne à None signifie une période ouverte.
+CHOCS_HISTORIQUES = [
+    # Période de croissance économique (2002-2008)
+    (2002, 2008, 'Investissement_Infrastructures', 1.4),
+    (2002, 2008, 'Aide_Internationale', 1.3),
+
+    # Impact de la crise financière mondiale (2008-2009)
+    (2008, 2009, 'Recettes_Totales', 0.88),
+    (2008, 2009, 'Investissement', 0.65),
+    (2008, 2009, 'Aide_Internationale', 1.25),  # Augmentation de l'aide
+
+    # Croissance forte post-crise (2010-2014)
+    (2010, 2014, 'Investissement_Agriculture', 1.3),
+    (2010, 2014, 'Investissement_Infrastructures', 1.5),
+
+    # Baisse des cours des matières premières (2014-2016)
+    (2014, 2016, 'Investissement_Mines', 0.6),
+    (2014, 2016, 'Recettes_Totales', 0.92),
+
+    # Programme de développement continental (2017-2019)
+    (2017, 2019, 'Aide_Internationale', 1.4),
+    (2017, 2019, 'Investissement_Eau', 1.8),
+    (2017, 2019, 'Investissement_Energie', 1.6),
+
+    # Impact de la crise COVID-19 (2020-2021)
+    (2020, 2020, 'Recettes_Totales', 0.78),
+    (2020, 2020, 'Investissement_Tourisme', 0.4),
+    (2020, 2020, 'Aide_Internationale', 1.35),
+    (2021, 2021, 'Subventions_Etat', 1.20),
+
+    # Plan de relance post-COVID et Agenda 2063 (2022-2025)
+    (2022, None, 'Investissement_Infrastructures', 1.25),
+    (2022, None, 'Investissement_Agriculture', 1.30),
+    (2022, None, 'Investissement_Sante', 1.40),
+]
+
+
+@lru_cache(maxsize=64)
+def _shock_matrix(years, columns):
+    """Compile la table des chocs en une matrice (années × colonnes) de multiplicateurs"""
+    years = np.asarray(years)
+    matrix = np.ones((len(years), len(columns)))
+    index = {column: k for k, column in enumerate(columns)}
+    for debut, fin, column, multiplier in CHOCS_HISTORIQUES:
+        if column not in index:
+            continue
+        mask = np.ones(len(years), dtype=bool)
+        if debut is not None:
+            mask &= years >= debut
+        if fin is not None:
+            mask &= years <= fin
+        matrix[mask, index[column]] *= multiplier
+    matrix.setflags(write=False)
+    return matrix
+
+
+def compile_shock_matrix(years, columns):
+    """Retourne la matrice des chocs historiques (mise en cache) pour ces années et colonnes"""
+    return _shock_matrix(tuple(int(year) for year in years), tuple(columns))
+
+
+@lru_cache(maxsize=8)
+def seasonal_profile(periods):
+    """Parts saisonnières (périodes × indicateurs): les flux somment à 1 sur l'année, stocks et ratios valent 1"""
+    months_per_period = 12 // periods
+    profile = np.ones((periods, len(COLONNES_INDICATEURS)))
+    for k, column in enumerate(COLONNES_INDICATEURS):
+        if column not in COLONNES_FLUX:
+            continue
+        key = "Investissement" if column.startswith("Investissement") else column
+        monthly = np.asarray(SAISONNALITE.get(key, [1.0] * 12), dtype=float)
+        shares = monthly.reshape(periods, months_per_period).sum(axis=1)
+        profile[:, k] = shares / shares.sum()
+    profile.setflags(write=False)
+    return profile
+
+
+def aggregate_annual(df):
+    """Réagrège des données trimestrielles ou mensuelles au pas annuel (flux sommés, stocks en fin d'année)"""
+    columns = [column for column in COLONNES_INDICATEURS if column in df]
+    rules = {column: 'sum' if column in COLONNES_FLUX else 'last' for column in columns}
+    return df.groupby('Annee', sort=True)[columns].agg(rules).reset_index()
+
+
+def compact_frame(df):
+    """Version compacte d'un DataFrame: montants en float32, Annee en int16, clés textuelles en catégories"""
+    types = {}
+    for column, dtype in df.dtypes.items():
+        if column == 'Annee':
+            types[column] = 'int16'
+        elif column == 'Periode':
+            types[column] = 'int8'
+        elif pd.api.types.is_float_dtype(dtype):
+            types[column] = 'float32'
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            types[column] = 'category'
+    return df.astype(types)
+
+
+def memory_report(df):
+    """Empreinte mémoire d'un DataFrame: octets par colonne, total et par ligne"""
+    usage = df.memory_usage(deep=True, index=True)
+    total = int(usage.sum())
+    return {
+        "lignes": len(df),
+        "total_octets": total,
+        "octets_par_ligne": round(total / max(len(df), 1), 1),
+        "colonnes": {str(column): {"dtype": str(df[column].dtype) if column in df else "index", 
+                                   "octets": int(size)} 
+                     for column, size in usage.items()},
+    }
+
+
+def _require_pyarrow(fmt):
+    """Vérifie la présence de pyarrow, nécessaire aux formats colonnaires"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"Le format {fmt} nécessite pyarrow (pip install pyarrow)") from None
+
+
+def _require_scipy(method):
+    """Importe scipy.stats.qmc et scipy.special.ndtri, nécessaires à l'échantillonnage quasi-aléatoire"""
+    try:
+        from scipy.stats import qmc
+        from scipy.special import ndtri
+    except ImportError:
+        raise ImportError(f"L'échantillonnage {method} nécessite scipy (pip install scipy)") from None
+    return qmc, ndtri
+
+
+def _check_compression(fmt, compression):
+    """Vérifie le format de données et que la compression est disponible pour ce format"""
+    if fmt not in FORMATS_DONNEES:
+        raise ValueError(f"Format de données inconnu: {fmt} (choix: {', '.join(FORMATS_DONNEES)})")
+    if compression and compression not in COMPRESSIONS_DONNEES[fmt]:
+        raise ValueError(f"compression {compression} indisponible en {fmt} "
+                         f"(choix: {', '.join(COMPRESSIONS_DONNEES[fmt])})")
+
+
+def frame_path(base_path, fmt="csv", compression=None):
+    """Ajoute au chemin (sans extension) l'extension du format et de la compression"""
+    _check_compression(fmt, compression)
+    path = base_path + FORMATS_DONNEES[fmt]
+    if fmt == "csv" and compression:
+        path += EXTENSIONS_COMPRESSION_CSV[compression]
+    return path
+
+
+def write_frame(df, path, fmt="csv", float32=False, compression=None):
+    """Écrit un DataFrame en CSV, Parquet ou Feather, en simple précision si float32"""
+    _check_compression(fmt, compression)
+    if float32:
+        floats = df.select_dtypes(include='float64').columns
+        df = df.astype({column: 'float32' for column in floats})
+    if fmt == "csv":
+        df.to_csv(path, index=False, compression=compression)
+    elif fmt == "parquet":
+        _require_pyarrow(fmt)
+        # Sans compression demandée, garde le défaut de pandas (snappy)
+        df.to_parquet(path, index=False, **({"compression": compression} if compression else {}))
+    elif fmt == "feather":
+        _require_pyarrow(fmt)
+        df.reset_index(drop=True).to_feather(path, **({"compression": compression} if compression else {}))
+    return path
+
+
+def read_frame(path):
+    """Relit un fichier écrit par write_frame (format déduit de l'extension)"""
+    if path.endswith(FORMATS_DONNEES["parquet"]):
+        _require_pyarrow("parquet")
+        return pd.read_parquet(path)
+    if path.endswith(FORMATS_DONNEES["feather"]):
+        _require_pyarrow("feather")
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+class PanelWriter:
+    """Panel (pays, commune, Annee) partitionné par pays, un fichier par commune sous root/pays=<pays>/"""
+    
+    def __init__(self, root, fmt="parquet", float32=False, compression=None):
+        self.root = root
+        self.fmt = fmt
+        self.float32 = float32
+        self.compression = compression
+        os.makedirs(root, exist_ok=True)
+    
+    def partition_dir(self, pays):
+        """Répertoire de la partition d'un pays"""
+        return os.path.join(self.root, f'pays={pays}')
+    
+    def append(self, pays, commune, df):
+        """Ajoute (ou remplace) les données d'une commune dans la partition de son pays"""
+        partition = self.partition_dir(pays)
+        os.makedirs(partition, exist_ok=True)
+        frame = df.copy()
+        frame.insert(0, 'commune', commune)
+        # Fichier temporaire puis renommage: un lecteur ne voit jamais de fichier partiel
+        path = frame_path(os.path.join(partition, commune), self.fmt, self.compression)
+        tmp_path = os.path.join(partition, f'.{os.path.basename(path)}.tmp')
+        write_frame(frame, tmp_path, self.fmt, self.float32, self.compression)
+        os.replace(tmp_path, path)
+        return path
+
+
+def _strip_data_extension(name):
+    """Nom de fichier sans l'extension de format (et de compression) de données"""
+    for extension in FORMATS_DONNEES.values():
+        if extension in name:
+            return name[:name.rindex(extension)]
+    return name
+
+
+def read_panel(root, pays=None, communes=None, compact=False):
+    """Charge le panel écrit par PanelWriter, en ne lisant que les partitions des pays et communes demandés"""
+    frames = []
+    for entry in sorted(os.listdir(root)):
+        if not entry.startswith('pays='):
+            continue
+        nom_pays = entry[len('pays='):]
+        if pays is not None and nom_pays not in pays:
+            continue
+        partition = os.path.join(root, entry)
+        for name in sorted(os.listdir(partition)):
+            if name.startswith('.'):
+                continue
+            commune = _strip_data_extension(name)
+            if communes is not None and commune not in communes:
+                continue
+            frame = read_frame(os.path.join(partition, name))
+            frame.insert(0, 'pays', nom_pays)
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['pays', 'commune', 'Annee'] + COLONNES_INDICATEURS)
+    panel = pd.concat(frames, ignore_index=True)
+    panel = panel.sort_values(['pays', 'commune', 'Annee'], ignore_index=True)
+    return compact_frame(panel) if compact else panel
+
+
+def stream_key(name):
+    """Clé entière stable (indépendante du processus) pour nommer un sous-flux aléatoire (64 bits)"""
+    return int.from_bytes(hashlib.sha256(name.encode('utf-8')).digest()[:8], 'big')
+
+
+def summarize_ensemble(years, paths, columns=COLONNES_INDICATEURS):
+    """Résume un ensemble (réplicats × années × indicateurs) en DataFrames moyenne, mediane, p5 et p95"""
+    p5, median, p95 = np.percentile(paths, [5, 50, 95], axis=0)
+    summary = {}
+    for name, values in [("moyenne", paths.mean(axis=0)), ("mediane", median), ("p5", p5), ("p95", p95)]:
+        frame = pd.DataFrame(values, columns=list(columns))
+        frame.insert(0, 'Annee', np.asarray(years))
+        summary[name] = frame
+    return summary
+
+class EnsembleAccumulator:
+    """Moments, extrema et quantiles approchés d'un ensemble, accumulés par lots et fusionnables (merge)"""
+    
+    def __init__(self, years, columns=COLONNES_INDICATEURS, relative_accuracy=0.005, buckets=2048):
+        self.years = np.asarray(years)
+        self.columns = list(columns)
+        shape = (len(self.years), len(self.columns))
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.buckets = buckets
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.minimum = np.full(shape, np.inf)
+        self.maximum = np.full(shape, -np.inf)
+        self.offset = None  # Premier bucket de chaque cellule, fixé par le premier lot
+        self.counts = np.zeros(shape + (buckets,), dtype=np.int64)
+        self.nonpositive = np.zeros(shape, dtype=np.int64)
+    
+    def _keys(self, values):
+        """Indices (non bornés) des buckets logarithmiques de valeurs strictement positives"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.ceil(np.log(values) / np.log(self.gamma))
+    
+    def update(self, paths):
+        """Ajoute un lot de réplicats (réplicats × années × indicateurs)"""
+        paths = np.asarray(paths, dtype=np.float64)
+        n_batch = len(paths)
+        if n_batch == 0:
+            return self
+        batch_mean = paths.mean(axis=0)
+        batch_m2 = ((paths - batch_mean) ** 2).sum(axis=0)
+        self._combine(n_batch, batch_mean, batch_m2, paths.min(axis=0), paths.max(axis=0))
+        
+        positive = paths > 0
+        keys = self._keys(np.where(positive, paths, 1.0))
+        if self.offset is None:
+            # Cellules centrées sur la médiane du premier lot
+            self.offset = (np.median(keys, axis=0) - self.buckets // 2).astype(np.int64)
+        keys = np.clip(keys - self.offset, 0, self.buckets - 1).astype(np.int64)
+        cells = np.arange(self.mean.size).reshape(self.mean.shape) * self.buckets
+        flat = (keys + cells)[positive]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.nonpositive += n_batch - positive.sum(axis=0)
+        return self
+    
+    def _combine(self, n_other, mean_other, m2_other, min_other, max_other):
+        """Combine moyenne, variance et extrêmes avec ceux d'un autre lot (Chan et al.)"""
+        total = self.count + n_other
+        delta = mean_other - self.mean
+        self.mean += delta * (n_other / total)
+        self.m2 += m2_other + delta ** 2 * (self.count * n_other / total)
+        self.count = total
+        np.minimum(self.minimum, min_other, out=self.minimum)
+        np.maximum(self.maximum, max_other, out=self.maximum)
+    
+    def merge(self, other):
+        """Fusionne un autre accumulateur (mêmes années, indicateurs et précision)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.offset = other.offset
+        self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        self.nonpositive += other.nonpositive
+        if np.array_equal(self.offset, other.offset):
+            self.counts += other.counts
+        else:
+            # Recale les buckets de other sur ceux de self
+            shift = (other.offset - self.offset)[..., None]
+            index = np.clip(np.arange(self.buckets) + shift, 0, self.buckets - 1)
+            cells = np.arange(self.mean.size).reshape(self.mean.shape + (1,)) * self.buckets
+            self.counts += np.bincount((index + cells).ravel(), weights=other.counts.ravel(), 
+                                       minlength=self.counts.size).reshape(self.counts.shape).astype(np.int64)
+        return self
+    
+    def variance(self, ddof=1):
+        """Variance par année et indicateur"""
+        return self.m2 / max(self.count - ddof, 1)
+    
+    def quantiles(self, q):
+        """Quantiles approchés (q dans [0, 1]): tableau (len(q) × années × indicateurs), NaN sans réplicat"""
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if self.count == 0:
+            return np.full((len(q),) + self.mean.shape, np.nan)
+        cumulative = np.cumsum(self.counts, axis=-1) + self.nonpositive[..., None]
+        estimates = 2 * self.gamma ** (np.arange(self.buckets) + self.offset[..., None]) / (self.gamma + 1)
+        result = np.empty((len(q),) + self.mean.shape)
+        for i, level in enumerate(q):
+            rank = level * (self.count - 1)
+            bucket = np.argmax(cumulative > rank, axis=-1)
+            value = np.take_along_axis(estimates, bucket[..., None], axis=-1)[..., 0]
+            value = np.where(self.nonpositive > rank, self.minimum, value)
+            result[i] = np.clip(value, self.minimum, self.maximum)
+        return result
+    
+    def summary(self):
+        """DataFrames par statistique, au format de summarize_ensemble (plus écart-type, min et max)"""
+        p5, median, p95 = self.quantiles([0.05, 0.5, 0.95])
+        summary = {}
+        for name, values in [("moyenne", self.mean), ("mediane", median), ("p5", p5), ("p95", p95), 
+                             ("ecart_type", np.sqrt(self.variance())), 
+                             ("min", self.minimum), ("max", self.maximum)]:
+            frame = pd.DataFrame(values, columns=self.columns)
+            frame.insert(0, 'Annee', self.years)
+            summary[name] = frame
+        return summary
+
+
+class CommuneRegistry:
+    """Registre indexé des communes et des devises chargé depuis un fichier JSON (configurations partagées, non modifiables)"""
+    
+    def __init__(self, data):
+        self.devises = data["devises"]
+        self.fx = FXEngine(data.get("taux_historiques", {}), 
+                           {devise["symbole"]: devise["taux_change"] for devise in self.devises.values()})
+        self.default_config = data["commune_defaut"]
+        self._configs = {}
+        self._by_name = {}
+        self._by_pays = {}
+        self._by_type = {}
+        self._by_specialite = {}
+        for entry in data["communes"]:
+            key = (entry["pays"], entry["commune"])
+            config = {field: entry.get(field, value) for field, value in self.default_config.items()}
+            self._configs[key] = config
+            self._by_name.setdefault(entry["commune"], key)
+            self._by_pays.setdefault(entry["pays"], []).append(entry["commune"])
+            self._by_type.setdefault(config["type"], []).append(key)
+            for specialite in config["specialites"]:
+                self._by_specialite.setdefault(specialite, []).append(key)
+    
+    @classmethod
+    def from_file(cls, path):
+        """Charge un registre depuis un fichier JSON"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    def __len__(self):
+        return len(self._configs)
+    
+    def __contains__(self, key):
+        return key in self._configs
+    
+    def communes_par_pays(self):
+        """Dictionnaire {pays: [communes]} dans l'ordre du fichier"""
+        return self._by_pays
+    
+    def by_pays(self, pays):
+        """Communes d'un pays"""
+        return list(self._by_pays.get(pays, []))
+    
+    def by_type(self, type_commune):
+        """Couples (pays, commune) d'un type donné (capitale, rurale, ...)"""
+        return list(self._by_type.get(type_commune, []))
+    
+    def by_specialite(self, specialite):
+        """Couples (pays, commune) ayant une spécialité donnée"""
+        return list(self._by_specialite.get(specialite, []))
+    
+    def devise(self, pays, strict=False):
+        """Configuration de la devise d'un pays"""
+        if pays in self.devises:
+            return self.devises[pays]
+        if strict:
+            raise KeyError(f"Pays inconnu du registre: {pays}")
+        print(f"⚠️ Pays inconnu du registre: {pays}, devise par défaut utilisée")
+        return self.devises["default"]
+    
+    def commune_config(self, commune, pays=None, strict=False):
+        """Configuration d'une commune, recherchée par (pays, commune) puis par nom"""
+        key = (pays, commune) if (pays, commune) in self._configs else self._by_name.get(commune)
+        if key is not None:
+            return self._configs[key]
+        if strict:
+            raise KeyError(f"Commune inconnue du registre: {commune} ({pays})")
+        print(f"⚠️ Commune inconnue du registre: {commune}, configuration par défaut utilisée")
+        return self.default_config
+
+
+class FXEngine:
+    """Taux de change historiques (unités pour 1 €) interpolés entre années repères, en cache par devise et plage d'années"""
+    
+    def __init__(self, series, fixed_rates):
+        self.series = {symbole: {int(year): float(rate) for year, rate in points.items()} 
+                       for symbole, points in series.items()}
+        self.fixed_rates = {"EUR": 1.0, **{symbole: float(rate) for symbole, rate in fixed_rates.items()}}
+        self._vectors = {}
+    
+    def _rate_range(self, symbole, first, last):
+        """Taux de symbole pour chaque année de first à last (vecteur en lecture seule, en cache)"""
+        key = (symbole, first, last)
+        vector = self._vectors.get(key)
+        if vector is None:
+            years = np.arange(first, last + 1)
+            points = self.series.get(symbole)
+            if points:
+                anchors = sorted(points)
+                vector = np.interp(years, anchors, [points[year] for year in anchors])
+            elif symbole in self.fixed_rates:
+                vector = np.full(len(years), self.fixed_rates[symbole])
+            else:
+                raise KeyError(f"Devise sans taux de change: {symbole}")
+            vector.setflags(write=False)
+            self._vectors[key] = vector
+        return vector
+    
+    def rates(self, symbole, years):
+        """Taux de symbole (unités pour 1 €) pour chaque année de years"""
+        years = np.asarray(years, dtype=int)
+        if len(years) == 0:
+            return np.empty(0)
+        first = int(years.min())
+        return self._rate_range(symbole, first, int(years.max()))[years - first]
+    
+    def matrix(self, symboles, years):
+        """Taux (len(symboles) × len(years)) de plusieurs devises sur les mêmes années"""
+        return np.stack([self.rates(symbole, years) for symbole in symboles])
+    
+    def factors(self, years, source, target="EUR"):
+        """Facteurs de conversion de source vers target pour chaque année"""
+        return self.rates(target, years) / self.rates(source, years)
+    
+    def panel_rates(self, symboles, years):
+        """Taux ligne à ligne d'un panel mêlant plusieurs devises (un seul accès indexé)"""
+        codes, uniques = pd.factorize(np.asarray(symboles))
+        years = np.asarray(years, dtype=int)
+        first, last = int(years.min()), int(years.max())
+        table = np.stack([self._rate_range(symbole, first, last) for symbole in uniques])
+        return table[codes, years - first]
+    
+    def convert_frame(self, df, source, targets=("EUR",), columns=None):
+        """Ajoute à df les colonnes <colonne>_<devise> des montants convertis vers chaque devise cible"""
+        columns = [column for column in (columns or COLONNES_MONTANTS) if column in df]
+        values = df[columns].to_numpy(dtype=float)
+        years = df['Annee'].to_numpy()
+        converted = [pd.DataFrame(values * self.factors(years, source, target)[:, None], 
+                                  columns=[f'{column}_{target}' for column in columns], index=df.index) 
+                     for target in targets]
+        return pd.concat([df] + converted, axis=1)
+
+
+@lru_cache(maxsize=None)
+def _load_registry(path):
+    return CommuneRegistry.from_file(path)
+
+
+def get_registry(path=None):
+    """Registre des communes chargé une fois par processus (data/communes.json ou variable ECO_REGISTRE)"""
+    return _load_registry(os.path.abspath(path or os.environ.get('ECO_REGISTRE', REGISTRE_DEFAUT)))
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint():
+    """Empreinte du code source d'Eco.py: toute modification invalide le cache"""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def frame_fingerprint(df):
+    """Empreinte du contenu d'un DataFrame (valeurs, index et colonnes)"""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update('|'.join(map(str, df.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Cache disque LRU des données et figures, adressé par le hachage de leurs paramètres"""
+    
+    def __init__(self, directory, max_bytes=1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._total = None  # Taille totale connue, calculée au premier ajout
+    
+    @staticmethod
+    def key(**parts):
+        """Clé de cache: hachage des paramètres (ordre indifférent)"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _path(self, key, extension):
+        return os.path.join(self.directory, f'{key}.{extension}')
+    
+    def _touch(self, path):
+        """Marque une entrée comme récemment utilisée (ordre LRU par date de modification)"""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+    
+    def get_frame(self, key):
+        """DataFrame en cache, ou None"""
+        path = self._path(key, 'pkl')
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            # Entrée tronquée ou corrompue (ex. processus interrompu): supprimée, comptée comme absente
+            print(f"⚠️ Entrée de cache illisible supprimée ({type(exc).__name__}): {path}")
+            self._remove(path)
+            return None
+        self._touch(path)
+        return df
+    
+    def put_frame(self, key, df, **meta):
+        """Met un DataFrame en cache"""
+        tmp_path = self._path(key, f'{os.getpid()}.tmp')
+        df.to_pickle(tmp_path)
+        self._store(key, 'pkl', tmp_path, meta)
+    
+    def get_file(self, key, extension):
+        """Chemin du fichier en cache (ex. figure), ou None"""
+        path = self._path(key, extension)
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        return path
+    
+    def put_file(self, key, source, extension, **meta):
+        """Copie un fichier (ex. figure) dans le cache"""
+        tmp_path = self._path(key, f'{os.getpid()}.tmp')
+        shutil.copyfile(source, tmp_path)
+        self._store(key, extension, tmp_path, meta)
+    
+    def _store(self, key, extension, tmp_path, meta):
+        """Installe atomiquement une entrée et ses métadonnées, puis applique la limite de taille"""
+        with open(self._path(key, 'json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        if self._total is None:
+            self._total = self.size()
+        path = self._path(key, extension)
+        try:
+            self._total -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        self._total += os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        if self._total > self.max_bytes:
+            self.evict()
+    
+    def _entries(self):
+        """Fichiers de données du cache: (date d'utilisation, taille, chemin)"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(('.json', '.tmp')):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def size(self):
+        """Taille totale des entrées en octets"""
+        return sum(size for _, size, _ in self._entries())
+    
+    def _remove(self, path):
+        key = os.path.basename(path).split('.', 1)[0]
+        for victim in (path, self._path(key, 'json')):
+            try:
+                size = os.path.getsize(victim)
+                os.remove(victim)
+            except FileNotFoundError:
+                continue
+            if victim == path and self._total is not None:
+                self._total -= size
+    
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        entries = sorted(self._entries())
+        # Parcours complet: recale aussi la taille connue (autres processus partageant le cache)
+        self._total = sum(size for _, size, _ in entries)
+        for _, _, path in entries:
+            if self._total <= self.max_bytes:
+                break
+            self._remove(path)
+    
+    def invalidate(self, key=None, **match):
+        """Supprime une entrée par clé, ou toutes celles dont les métadonnées correspondent (ex. commune="Dakar")"""
+        removed = 0
+        for _, _, path in self._entries():
+            entry_key = os.path.basename(path).split('.', 1)[0]
+            if key is not None and entry_key != key:
+                continue
+            if match:
+                try:
+                    with open(self._path(entry_key, 'json'), encoding='utf-8') as f:
+                        meta = json.load(f)
+                except FileNotFoundError:
+                    continue
+                if any(meta.get(field) != value for field, value in match.items()):
+                    continue
+            self._remove(path)
+            removed += 1
+        return removed
+
+
+class Instrumentation:
+    """Mesure des étapes d'une commune (durée, temps CPU, pic mémoire) et profilage cProfile d'une étape"""
+    
+    def __init__(self, enabled=True, memory=True, profile_stage=None, profile_dir=None, label=None):
+        self.enabled = enabled
+        self.memory = memory and enabled
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.label = label
+        self.records = []
+        self.profiles = []
+    
+    def stage(self, name):
+        """Contexte mesurant l'étape name"""
+        if not self.enabled and name != self.profile_stage:
+            return _CONTEXTE_VIDE
+        return self._measure(name)
+    
+    @contextmanager
+    def _measure(self, name):
+        profiler = None
+        if name == self.profile_stage:
+            import cProfile
+            profiler = cProfile.Profile()
+        tracing = False
+        if self.memory:
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record = {"etape": name, 
+                      "duree_s": round(time.perf_counter() - wall, 6), 
+                      "cpu_s": round(time.process_time() - cpu, 6)}
+            if self.memory:
+                record["pic_memoire_octets"] = max(tracemalloc.get_traced_memory()[1] - memory_start, 0)
+                if tracing:
+                    tracemalloc.stop()
+            if self.enabled:
+                self.records.append(record)
+            if profiler is not None:
+                self._dump_profile(profiler, name)
+    
+    def _dump_profile(self, profiler, name):
+        """Écrit le profil cProfile d'une étape (binaire pstats et 30 premières lignes en texte)"""
+        import pstats
+        os.makedirs(self.profile_dir or '.', exist_ok=True)
+        path = os.path.join(self.profile_dir or '.', f'{self.label or "profil"}_{name}.prof')
+        profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(30)
+        with open(path[:-len('.prof')] + '.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+        self.profiles.append(path)
+    
+    def report(self):
+        """Mesures de toutes les étapes, pic mémoire global et RSS maximal du processus"""
+        report = {"etapes": self.records}
+        if self.memory:
+            report["pic_memoire_octets"] = max((r["pic_memoire_octets"] for r in self.records), default=0)
+        try:
+            import resource
+            # ru_maxrss est en Kio sous Linux
+            report["rss_max_octets"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            pass
+        if self.profiles:
+            report["profils"] = self.profiles
+        return report
+
+
+# Étapes mesurées par l'instrumentation (choix de --profile-stage)
+ETAPES_INSTRUMENTEES = ("simulation", "tendances", "resolution", "ecriture", "panel", 
+                        "insights", "previsions", "trace", "savefig")
+
+_CONTEXTE_VIDE = nullcontext()
+SANS_INSTRUMENTATION = Instrumentation(enabled=False)
+
+
+def stage_summary(results):
+    """Agrège les mesures d'étapes de plusieurs communes: total, moyenne et maximum par étape"""
+    totals = {}
+    for result in results:
+        for record in result.get("instrumentation", {}).get("etapes", []):
+            entry = totals.setdefault(record["etape"], {"etape": record["etape"], "appels": 0, 
+                                                        "duree_s": 0.0, "cpu_s": 0.0, "duree_max_s": 0.0})
+            entry["appels"] += 1
+            entry["duree_s"] += record["duree_s"]
+            entry["cpu_s"] += record["cpu_s"]
+            entry["duree_max_s"] = max(entry["duree_max_s"], record["duree_s"])
+            if "pic_memoire_octets" in record:
+                entry["pic_memoire_octets"] = max(entry.get("pic_memoire_octets", 0), record["pic_memoire_octets"])
+    summary = sorted(totals.values(), key=lambda entry: entry["duree_s"], reverse=True)
+    for entry in summary:
+        entry["duree_s"] = round(entry["duree_s"], 6)
+        entry["cpu_s"] = round(entry["cpu_s"], 6)
+        entry["duree_moyenne_s"] = round(entry["duree_s"] / entry["appels"], 6)
+    return summary
+
+
 class AfriqueCommuneFinanceAnalyzer:
-    def __init__(self, commune_name, pays):
+    def __init__(self, commune_name, pays, output_dir='.', seed=None, registry=None, cache=None, 
+                 start_year=2002, end_year=2025, instrumentation=None, sampling="mc"):
+        if sampling not in METHODES_ECHANTILLONNAGE:
+            raise ValueError(f"Échantillonnage inconnu: {sampling} (choix: {', '.join(METHODES_ECHANTILLONNAGE)})")
         self.commune = commune_name
         self.pays = pays
+        self.output_dir = output_dir
+        self.registry = registry if registry is not None else get_registry()
+        self.cache = cache
+        self.instrumentation = instrumentation or SANS_INSTRUMENTATION
         self.colors = ['#008000', '#FFD700', '#DC143C', '#0000FF', '#FF4500', 
                       '#4B0082', '#00CED1', '#FF69B4', '#32CD32', '#8B4513']
         
-        self.start_year = 2002
-        self.end_year = 2025
+        self.start_year = start_year
+        self.end_year = end_year
         
         # Configuration des devises par pays
         self.devise_config = self._get_devise_config()
         self.devise = self.devise_config["devise"]
         self.symbole = self.devise_config["symbole"]
-        self.taux_change = self.devise_config["taux_change"]  # 1€ = X devise locale
+        self.taux_change = self.devise_config["taux_change"]  # 1€ = X devise locale (taux actuel)
+        self.fx = self.registry.fx  # Taux historiques, année par année
         
         # Configuration spécifique à chaque commune africaine
         self.config = self._get_commune_config()
+        self._compile_indicators()
+        
+        # Graine reproductible: sous-flux indépendants par commune, indicateur et bloc de réplicats
+        # (sans graine explicite, les résultats sont aléatoires et ne sont pas mis en cache)
+        self._seed_fixed = seed is not None
+        self.seed = np.random.SeedSequence(seed).entropy
+        self._commune_key = stream_key(f"{self.pays}/{self.commune}")
+        self._indicator_keys = [stream_key(column) for column in COLONNES_INDICATEURS]
+        # Stratégie de tirage des ensembles (la trajectoire unique reste Monte Carlo)
+        self.sampling = sampling
         
     def _get_devise_config(self):
         """Retourne la configuration des devises par pays"""
-        devises = {
-            "Sénégal": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Côte d'Ivoire": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Cameroun": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Gabon": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Maroc": {"devise": "Dirham", "symbole": "MAD", "taux_change": 11},
-            "Tunisie": {"devise": "Dinar", "symbole": "TND", "taux_change": 3.3},
-            "Algérie": {"devise": "Dinar", "symbole": "DZD", "taux_change": 145},
-            "Nigeria": {"devise": "Naira", "symbole": "NGN", "taux_change": 1600},
-            "Ghana": {"devise": "Cedi", "symbole": "GHS", "taux_change": 15},
-            "Kenya": {"devise": "Shilling", "symbole": "KES", "taux_change": 160},
-            "Afrique du Sud": {"devise": "Rand", "symbole": "ZAR", "taux_change": 20},
-            "RDC": {"devise": "Franc Congolais", "symbole": "CDF", "taux_change": 2700},
-            "Mali": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Burkina Faso": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Bénin": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "Togo": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655},
-            "default": {"devise": "Franc CFA", "symbole": "FCFA", "taux_change": 655}
-        }
-        
-        return devises.get(self.pays, devises["default"])
+        return self.registry.devise(self.pays)
     
     def _get_commune_config(self):
         """Retourne la configuration spécifique pour chaque commune africaine"""
-        configs = {
-            # Villes capitales
-            "Dakar": {
-                "population_base": 1200000,
-                "budget_base": 85000,  # en millions de FCFA
-                "type": "capitale",
-                "specialites": ["administration", "port", "commerce", "education", "sante"]
-            },
-            "Abidjan": {
-                "population_base": 4800000,
-                "budget_base": 120000,
-                "type": "economique",
-                "specialites": ["port", "commerce", "industrie", "finance", "transport"]
-            },
-            "Yaoundé": {
-                "population_base": 2800000,
-                "budget_base": 75000,
-                "type": "politique",
-                "specialites": ["administration", "education", "culture", "agriculture"]
-            },
-            "Lagos": {
-                "population_base": 15000000,
-                "budget_base": 450000,  # en millions de Naira
-                "type": "megapole",
-                "specialites": ["commerce", "port", "industrie", "technologie", "finance"]
-            },
-            "Accra": {
-                "population_base": 2500000,
-                "budget_base": 95000,  # en millions de Cedis
-                "type": "capitale",
-                "specialites": ["administration", "commerce", "port", "education", "tourisme"]
-            },
-            "Nairobi": {
-                "population_base": 4500000,
-                "budget_base": 180000,  # en millions de Shillings
-                "type": "regionale",
-                "specialites": ["technologie", "commerce", "diplomatie", "transport", "tourisme"]
-            },
-            "Kinshasa": {
-                "population_base": 17000000,
-                "budget_base": 950000,  # en millions de Francs Congolais
-                "type": "megapole",
-                "specialites": ["administration", "commerce", "port_fluvial", "mines", "agriculture"]
-            },
-            "Johannesburg": {
-                "population_base": 6000000,
-                "budget_base": 280000,  # en millions de Rands
-                "type": "economique",
-                "specialites": ["mines", "finance", "commerce", "industrie", "tourisme"]
-            },
-            "Casablanca": {
-                "population_base": 3700000,
-                "budget_base": 180000,  # en millions de Dirhams
-                "type": "economique",
-                "specialites": ["port", "industrie", "commerce", "finance", "tourisme"]
-            },
-            "Alger": {
-                "population_base": 3500000,
-                "budget_base": 220000,  # en millions de Dinars
-                "type": "capitale",
-                "specialites": ["administration", "port", "industrie", "commerce", "culture"]
-            },
-            
-            # Villes secondaires
-            "Saint-Louis": {
-                "population_base": 180000,
-                "budget_base": 12000,
-                "type": "historique",
-                "specialites": ["tourisme", "culture", "peche", "education"]
-            },
-            "Bouaké": {
-                "population_base": 740000,
-                "budget_base": 28000,
-                "type": "interieure",
-                "specialites": ["agriculture", "commerce", "transport", "education"]
-            },
-            "Douala": {
-                "population_base": 3000000,
-                "budget_base": 95000,
-                "type": "economique",
-                "specialites": ["port", "industrie", "commerce", "transport", "logistique"]
-            },
-            "Kumasi": {
-                "population_base": 2100000,
-                "budget_base": 45000,
-                "type": "culturelle",
-                "specialites": ["culture", "commerce", "agriculture", "artisanat"]
-            },
-            "Mombasa": {
-                "population_base": 1200000,
-                "budget_base": 55000,
-                "type": "portuaire",
-                "specialites": ["port", "tourisme", "commerce", "transport_maritime"]
-            },
-            "Lubumbashi": {
-                "population_base": 2000000,
-                "budget_base": 85000,
-                "type": "miniere",
-                "specialites": ["mines", "commerce", "industrie", "transport"]
-            },
-            "Cape Town": {
-                "population_base": 4400000,
-                "budget_base": 195000,
-                "type": "touristique",
-                "specialites": ["tourisme", "port", "vin", "technologie", "culture"]
-            },
-            "Marrakech": {
-                "population_base": 930000,
-                "budget_base": 65000,
-                "type": "touristique",
-                "specialites": ["tourisme", "culture", "artisanat", "commerce"]
-            },
-            "Tunis": {
-                "population_base": 640000,
-                "budget_base": 48000,
-                "type": "capitale",
-                "specialites": ["administration", "tourisme", "culture", "education", "sante"]
-            },
-            
-            # Communes rurales
-            "Tamba": {
-                "population_base": 85000,
-                "budget_base": 3500,
-                "type": "rurale",
-                "specialites": ["agriculture", "elevage", "artisanat", "commerce_local"]
-            },
-            "Korhogo": {
-                "population_base": 290000,
-                "budget_base": 9500,
-                "type": "rurale",
-                "specialites": ["agriculture", "culture", "artisanat", "commerce_regional"]
-            },
-            "Garoua": {
-                "population_base": 600000,
-                "budget_base": 18000,
-                "type": "rurale",
-                "specialites": ["agriculture", "elevage", "commerce", "transport_fluvial"]
-            },
-            "Tamale": {
-                "population_base": 370000,
-                "budget_base": 12500,
-                "type": "rurale",
-                "specialites": ["agriculture", "commerce", "education", "sante_regionale"]
-            },
-            
-            # Configuration par défaut
-            "default": {
-                "population_base": 50000,
-                "budget_base": 2500,
-                "type": "locale",
-                "specialites": ["agriculture", "commerce_local", "services", "artisanat"]
-            }
-        }
-        
-        return configs.get(self.commune, configs["default"])
+        return self.registry.commune_config(self.commune, self.pays)
     
-    def _convert_to_local_currency(self, amount_eur):
-        """Convertit un montant d'euros en devise locale"""
-        return amount_eur * self.taux_change
+    def data_path(self, fmt="csv", compression=None, resolution="annuel"):
+        """Chemin du fichier de données de la commune (CSV par défaut)"""
+        suffix = "" if resolution == "annuel" else f"_{resolution}"
+        return frame_path(os.path.join(self.output_dir, 
+                                       f'{self.commune}_{self.pays}_financial_data_{self.start_year}_{self.end_year}{suffix}'), 
+                          fmt, compression)
     
-    def generate_financial_data(self):
-        """Génère des données financières pour la commune africaine"""
-        print(f"🏛️ Génération des données financières pour {self.commune}, {self.pays}...")
-        
-        # Créer une base de données annuelle
-        dates = pd.date_range(start=f'{self.start_year}-01-01', 
-                             end=f'{self.end_year}-12-31', freq='Y')
-        
-        data = {'Annee': [date.year for date in dates]}
-        
-        # Données démographiques (croissance africaine très forte)
-        data['Population'] = self._simulate_population(dates)
-        data['Menages'] = self._simulate_households(dates)
-        
-        # Recettes communales en devise locale
-        data['Recettes_Totales'] = self._simulate_total_revenue(dates)
-        data['Impots_Locaux'] = self._simulate_tax_revenue(dates)
-        data['Subventions_Etat'] = self._simulate_state_grants(dates)
-        data['Aide_Internationale'] = self._simulate_international_aid(dates)
-        data['Autres_Recettes'] = self._simulate_other_revenue(dates)
-        
-        # Dépenses communales en devise locale
-        data['Depenses_Totales'] = self._simulate_total_expenses(dates)
-        data['Fonctionnement'] = self._simulate_operating_expenses(dates)
-        data['Investissement'] = self._simulate_investment_expenses(dates)
-        data['Charge_Dette'] = self._simulate_debt_charges(dates)
-        data['Personnel'] = self._simulate_staff_costs(dates)
-        
-        # Indicateurs financiers
-        data['Epargne_Brute'] = self._simulate_gross_savings(dates)
-        data['Dette_Totale'] = self._simulate_total_debt(dates)
-        data['Taux_Endettement'] = self._simulate_debt_ratio(dates)
-        data['Taux_Fiscalite'] = self._simulate_tax_rate(dates)
-        
-        # Investissements spécifiques adaptés à l'Afrique
-        data['Investissement_Agriculture'] = self._simulate_agriculture_investment(dates)
-        data['Investissement_Infrastructures'] = self._simulate_infrastructure_investment(dates)
-        data['Investissement_Sante'] = self._simulate_health_investment(dates)
-        data['Investissement_Education'] = self._simulate_education_investment(dates)
-        data['Investissement_Eau'] = self._simulate_water_investment(dates)
-        data['Investissement_Energie'] = self._simulate_energy_investment(dates)
-        data['Investissement_Mines'] = self._simulate_mining_investment(dates)
-        data['Investissement_Tourisme'] = self._simulate_tourism_investment(dates)
-        
-        df = pd.DataFrame(data)
-        
-        # Ajouter des tendances spécifiques au contexte africain
-        self._add_african_trends(df)
-        
-        return df
+    def save_financial_data(self, df, fmt="csv", float32=False, compression=None, resolution="annuel"):
+        """Sauvegarde les données en CSV, Parquet ou Feather et retourne le chemin du fichier"""
+        with self.instrumentation.stage("ecriture"):
+            return write_frame(df, self.data_path(fmt, compression, resolution), fmt, float32, compression)
     
-    def _simulate_population(self, dates):
-        """Simule la population de la commune (croissance africaine très forte)"""
-        base_population = self.config["population_base"]
-        
-        population = []
-        for i, date in enumerate(dates):
-            # Croissance démographique africaine (très forte)
-            if self.config["type"] == "megapole":
-                growth_rate = 0.045  # Croissance très forte dans les mégapoles
-            elif self.config["type"] == "capitale":
-                growth_rate = 0.042  # Croissance forte dans les capitales
-            elif self.config["type"] == "rurale":
-                growth_rate = 0.035  # Croissance rurale plus modérée
-            else:
-                growth_rate = 0.040  # Croissance moyenne
-                
-            growth = 1 + growth_rate * i
-            population.append(base_population * growth)
-        
-        return population
-    
-    def _simulate_households(self, dates):
-        """Simule le nombre de ménages (taille moyenne plus grande en Afrique)"""
-        base_households = self.config["population_base"] / 5.5  # Taille des ménages plus grande
-        
-        households = []
-        for i, date in enumerate(dates):
-            growth = 1 + 0.035 * i  # Croissance forte
-            households.append(base_households * growth)
-        
-        return households
+    def figure_path(self, fmt="png"):
+        """Chemin de la figure d'analyse de la commune"""
+        return os.path.join(self.output_dir, f'{self.commune}_{self.pays}_financial_analysis.{fmt}')
     
-    def _simulate_total_revenue(self, dates):
-        """Simule les recettes totales de la commune en devise locale"""
-        base_revenue = self._convert_to_local_currency(self.config["budget_base"])
-        
-        revenue = []
-        for i, date in enumerate(dates):
-            # Croissance économique africaine (variable selon le type)
-            if self.config["type"] == "economique":
-                growth_rate = 0.065  # Croissance très forte dans les pôles économiques
-            elif self.config["type"] == "miniere":
-                growth_rate = 0.072  # Croissance explosive dans les zones minières
-            elif self.config["type"] == "rurale":
-                growth_rate = 0.048  # Croissance rurale plus modérée
-            else:
-                growth_rate = 0.058  # Croissance moyenne
-                
-            growth = 1 + growth_rate * i
-            noise = np.random.normal(1, 0.12)  # Plus de volatilité
-            revenue.append(base_revenue * growth * noise)
-        
-        return revenue
-    
-    def _simulate_tax_revenue(self, dates):
-        """Simule les recettes fiscales en devise locale"""
-        base_tax = self._convert_to_local_currency(self.config["budget_base"] * 0.25)  # Part faible des impôts
-        
-        tax_revenue = []
-        for i, date in enumerate(dates):
-            growth = 1 + 0.045 * i  # Croissance moyenne
-            noise = np.random.normal(1, 0.15)  # Forte volatilité
-            tax_revenue.append(base_tax * growth * noise)
-        
-        return tax_revenue
+    def _convert_to_local_currency(self, amount_eur, years=None):
+        """Convertit des montants en euros en devise locale, au taux actuel ou à celui de chaque année de years"""
+        if years is None:
+            return amount_eur * self.taux_change
+        rates = self.fx.rates(self.symbole, years)
+        return np.asarray(amount_eur) * rates.reshape((-1,) + (1,) * (np.ndim(amount_eur) - 1))
     
-    def _simulate_state_grants(self, dates):
-        """Simule les subventions de l'État (très importantes en Afrique)"""
-        base_grants = self._convert_to_local_currency(self.config["budget_base"] * 0.45)  # Part importante
-        
-        grants = []
-        for i, date in enumerate(dates):
-            year = date.year
-            # Augmentation variable selon les politiques
-            if year >= 2010:
-                increase = 1 + 0.015 * (year - 2010)
-            else:
-                increase = 1
-            
-            noise = np.random.normal(1, 0.10)
-            grants.append(base_grants * increase * noise)
-        
-        return grants
+    def with_currencies(self, df, currencies=("EUR",)):
+        """Ajoute les montants convertis dans chaque devise de currencies (colonnes <colonne>_<devise>)"""
+        return self.fx.convert_frame(df, self.symbole, currencies)
     
-    def _simulate_international_aid(self, dates):
-        """Simule l'aide internationale (spécifique à l'Afrique)"""
-        base_aid = self._convert_to_local_currency(self.config["budget_base"] * 0.15)  # Part importante
-        
-        aid = []
-        for i, date in enumerate(dates):
-            year = date.year
-            # Variations selon les programmes internationaux
-            if year in [2005, 2010, 2015, 2020]:
-                multiplier = 1.8  # Années de programmes d'aide
-            elif year in [2008, 2014, 2022]:
-                multiplier = 0.7  # Réduction pendant les crises
-            else:
-                multiplier = 1.0
-            
-            growth = 1 + 0.025 * i
-            noise = np.random.normal(1, 0.25)  # Très forte volatilité
-            aid.append(base_aid * growth * multiplier * noise)
-        
-        return aid
+    def _cache_meta(self, kind, **options):
+        """Paramètres identifiant un résultat dans le cache"""
+        return dict(type_resultat=kind, commune=self.commune, pays=self.pays, 
+                    config=self.config, devise=self.devise_config, 
+                    change=self.fx.series.get(self.symbole), seed=self.seed, 
+                    periode=[self.start_year, self.end_year], chocs=CHOCS_HISTORIQUES, 
+                    indicateurs=INDICATEURS_SIMULES, code=code_fingerprint(), **options)
     
-    def _simulate_other_revenue(self, dates):
-        """Simule les autres recettes en devise locale"""
-        base_other = self._convert_to_local_currency(self.config["budget_base"] * 0.15)
+    def generate_financial_data(self, compact=False, resolution="annuel"):
+        """Génère des données financières pour la commune africaine"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Résolution inconnue: {resolution} (choix: {', '.join(RESOLUTIONS)})")
+        cache_key = None
+        if self.cache is not None and self._seed_fixed:
+            meta = self._cache_meta('donnees')
+            cache_key = ResultCache.key(**meta)
+            cached = self.cache.get_frame(cache_key)
+            if cached is not None:
+                print(f"♻️ Données en cache pour {self.commune}, {self.pays}")
+                cached = self.to_resolution(cached, resolution)
+                return compact_frame(cached) if compact else cached
         
-        other_revenue = []
-        for i, date in enumerate(dates):
-            growth = 1 + 0.038 * i
-            noise = np.random.normal(1, 0.18)
-            other_revenue.append(base_other * growth * noise)
+        print(f"🏛️ Génération des données financières pour {self.commune}, {self.pays}...")
         
-        return other_revenue
-    
-    def _simulate_total_expenses(self, dates):
-        """Simule les dépenses totales en devise locale"""
-        base_expenses = self._convert_to_local_currency(self.config["budget_base"] * 0.95)  # Dépenses proches des recettes
+        # Créer une base de données annuelle
+        years = np.arange(self.start_year, self.end_year + 1)
         
-        expenses = []
-        for i, date in enumerate(dates):
-            growth = 1 + 0.052 * i  # Croissance forte
-            noise = np.random.normal(1, 0.09)
-            expenses.append(base_expenses * growth * noise)
+        # Démographie, recettes, dépenses, indicateurs et investissements sectoriels
+        with self.instrumentation.stage("simulation"):
+            values = self._simulate_indicators(years)
+            df = pd.DataFrame(values, columns=COLONNES_INDICATEURS)
+            df.insert(0, 'Annee', years)
         
-        return expenses
+        # Ajouter des tendances spécifiques au contexte africain
+        with self.instrumentation.stage("tendances"):
+            self._add_african_trends(df)
+        
+        if cache_key is not None:
+            self.cache.put_frame(cache_key, df, **meta)
+        if resolution != "annuel":
+            with self.instrumentation.stage("resolution"):
+                df = self.to_resolution(df, resolution)
+        return compact_frame(df) if compact else df
     
-    def _simulate_operating_expenses(self, dates):
-        """Simule les dépenses de fonctionnement en devise locale"""
-        base_operating = self._convert_to_local_currency(self.config["budget_base"] * 0.70)  # Part très importante
-        
-        operating = []
-        for i, date in enumerate(dates):
-            growth = 1 + 0.048 * i
-            noise = np.random.normal(1, 0.08)
-            operating.append(base_operating * growth * noise)
-        
-        return operating
+    def to_resolution(self, df, resolution="annuel"):
+        """Désagrège des données annuelles au pas trimestriel ou mensuel (les périodes somment au total annuel)"""
+        periods = RESOLUTIONS[resolution]
+        if periods == 1:
+            return df
+        years = df['Annee'].to_numpy()
+        annual = df[COLONNES_INDICATEURS].to_numpy()
+        values = annual[:, None, :] * self._seasonal_weights(years, periods)
+        
+        out = pd.DataFrame(values.reshape(-1, len(COLONNES_INDICATEURS)), columns=COLONNES_INDICATEURS)
+        period = np.tile(np.arange(1, periods + 1), len(years))
+        months = (np.repeat(years, periods) - 1970) * 12 + (period - 1) * (12 // periods)
+        out.insert(0, 'Date', months.astype('datetime64[M]').astype('datetime64[ns]'))
+        out.insert(0, 'Periode', period)
+        out.insert(0, 'Annee', np.repeat(years, periods))
+        return out
     
-    def _simulate_investment_expenses(self, dates):
-        """Simule les dépenses d'investissement en devise locale"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.25)  # Part plus faible
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            # Plans d'investissement liés aux programmes de développement
-            if year in [2005, 2010, 2015, 2020]:
-                multiplier = 2.0  # Années d'investissement massif
-            elif year in [2008, 2014, 2021]:
-                multiplier = 0.6  # Réduction pendant les crises
-            else:
-                multiplier = 1.0
-            
-            growth = 1 + 0.040 * i
-            noise = np.random.normal(1, 0.22)  # Très forte volatilité
-            investment.append(base_investment * growth * multiplier * noise)
-        
-        return investment
+    def _seasonal_weights(self, years, periods):
+        """Parts saisonnières (années × périodes × indicateurs), perturbées année par année dans un sous-flux dédié"""
+        profile = seasonal_profile(periods)
+        noise = self._generator(FLUX_SAISONNALITE, periods).standard_normal(
+            (len(years), periods, len(COLONNES_INDICATEURS)))
+        noise *= VOLATILITE_SAISONNIERE
+        noise += 1
+        weights = np.maximum(noise, 0.05, out=noise) * profile
+        flows = [COLONNES_INDICATEURS.index(column) for column in COLONNES_FLUX]
+        weights[:, :, flows] /= weights[:, :, flows].sum(axis=1, keepdims=True)
+        weights[:, :, np.setdiff1d(np.arange(len(COLONNES_INDICATEURS)), flows)] = 1
+        return weights
     
-    def _simulate_debt_charges(self, dates):
-        """Simule les charges de la dette en devise locale"""
-        base_debt_charge = self._convert_to_local_currency(self.config["budget_base"] * 0.08)  # Charges importantes
-        
-        debt_charges = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year >= 2005:
-                increase = 1 + 0.012 * (year - 2005)
+    def _compile_indicators(self):
+        """Précalcule les paramètres constants des indicateurs pour cette commune"""
+        bases, rates, anchors, multipliers, sigmas = [], [], [], [], []
+        for spec in INDICATEURS_SIMULES:
+            if spec["base"] == "population":
+                base = self.config["population_base"] * spec["part"]
+            elif spec["base"] == "budget":
+                # En euros: la conversion, année par année, est faite dans _deterministic_matrix
+                base = self.config["budget_base"] * spec["part"]
             else:
-                increase = 1
-            
-            noise = np.random.normal(1, 0.15)
-            debt_charges.append(base_debt_charge * increase * noise)
-        
-        return debt_charges
+                base = spec["part"]
+
+            # Croissance variable selon le type de commune
+            rate = spec["croissance"]
+            if isinstance(rate, dict):
+                rate = rate.get(self.config["type"], rate["default"])
+
+            # Ajustement selon les spécialités
+            multiplier = 1.0
+            if spec.get("specialite"):
+                specialite, present, absent = spec["specialite"]
+                multiplier = present if specialite in self.config["specialites"] else absent
+
+            bases.append(base)
+            rates.append(rate)
+            anchors.append(spec.get("depuis") or self.start_year)
+            multipliers.append(multiplier)
+            sigmas.append(spec["volatilite"])
+
+        self._bases = np.array(bases, dtype=float) * np.array(multipliers, dtype=float)
+        self._rates = np.array(rates, dtype=float)
+        self._anchors = np.array(anchors, dtype=float)
+        self._sigmas = np.array(sigmas, dtype=float)
+        self._montants = np.array([spec["base"] == "budget" for spec in INDICATEURS_SIMULES])
+
+    def _event_matrix(self, years):
+        """Matrice (années × indicateurs) des multiplicateurs d'événements ponctuels"""
+        events = np.ones((len(years), len(INDICATEURS_SIMULES)))
+        for k, spec in enumerate(INDICATEURS_SIMULES):
+            for year, multiplier in spec.get("evenements", {}).items():
+                events[years == year, k] = multiplier
+        return events
+
+    def _deterministic_matrix(self, years):
+        """Partie déterministe (sans bruit) de tous les indicateurs, années × indicateurs"""
+        years = np.asarray(years, dtype=float)
+        elapsed = np.maximum(years[:, None] - self._anchors[None, :], 0)
+        growth = 1 + self._rates[None, :] * elapsed
+        deterministic = self._bases[None, :] * growth * self._event_matrix(years)
+        deterministic[:, self._montants] = self._convert_to_local_currency(deterministic[:, self._montants], years)
+        return deterministic
+
+    def _generator(self, *key):
+        """Générateur indépendant pour un sous-flux (commune, *key) de la graine"""
+        seed_seq = np.random.SeedSequence(self.seed, spawn_key=(self._commune_key,) + key)
+        return np.random.Generator(np.random.PCG64(seed_seq))
     
-    def _simulate_staff_costs(self, dates):
-        """Simule les dépenses de personnel en devise locale"""
-        base_staff = self._convert_to_local_currency(self.config["budget_base"] * 0.50)  # Part très importante
-        
-        staff_costs = []
-        for i, date in enumerate(dates):
-            growth = 1 + 0.045 * i
-            noise = np.random.normal(1, 0.07)
-            staff_costs.append(base_staff * growth * noise)
-        
-        return staff_costs
+    def _standard_noise(self, n_years, n_replicates=None, first_replicate=0, dtype=np.float64):
+        """Bruits N(0, 1) de chaque indicateur, tirés par blocs de réplicats dans son propre sous-flux"""
+        n_indicators = len(self._indicator_keys)
+        if n_replicates is None:
+            noise = np.empty((n_years, n_indicators))
+            for k, key in enumerate(self._indicator_keys):
+                noise[:, k] = self._generator(FLUX_TRAJECTOIRE, key).standard_normal(n_years)
+            return noise
+        
+        noise = np.empty((n_replicates, n_years, n_indicators), dtype=dtype)
+        last_replicate = first_replicate + n_replicates
+        for block in range(first_replicate // TAILLE_BLOC_REPLICATS, 
+                           (last_replicate - 1) // TAILLE_BLOC_REPLICATS + 1):
+            block_start = block * TAILLE_BLOC_REPLICATS
+            lo = max(first_replicate, block_start)
+            hi = min(last_replicate, block_start + TAILLE_BLOC_REPLICATS)
+            for k, key in enumerate(self._indicator_keys):
+                draws = self._block_noise(self._generator(FLUX_ENSEMBLE, block, key), n_years)
+                noise[lo - first_replicate:hi - first_replicate, :, k] = draws[lo - block_start:hi - block_start]
+        return noise
     
-    def _simulate_gross_savings(self, dates):
-        """Simule l'épargne brute en devise locale"""
-        savings = []
-        for i, date in enumerate(dates):
-            base_saving = self._convert_to_local_currency(self.config["budget_base"] * 0.02)  # Épargne faible
-            
-            year = date.year
-            if year >= 2010:
-                improvement = 1 + 0.006 * (year - 2010)  # Amélioration lente
-            else:
-                improvement = 1
-            
-            noise = np.random.normal(1, 0.20)  # Très forte volatilité
-            savings.append(base_saving * improvement * noise)
-        
-        return savings
+    def _block_noise(self, generator, n_years):
+        """Bruits N(0, 1) d'un bloc de réplicats pour un indicateur, selon la méthode d'échantillonnage"""
+        if self.sampling == "mc":
+            return generator.standard_normal((TAILLE_BLOC_REPLICATS, n_years))
+        if self.sampling == "antithetique":
+            half = generator.standard_normal((TAILLE_BLOC_REPLICATS // 2, n_years))
+            draws = np.empty((TAILLE_BLOC_REPLICATS, n_years))
+            draws[0::2] = half
+            draws[1::2] = -half
+            return draws
+        qmc, ndtri = _require_scipy(self.sampling)
+        if self.sampling == "lhs":
+            # Une permutation des strates par année, puis une position uniforme dans chaque strate
+            strata = np.argsort(generator.random((TAILLE_BLOC_REPLICATS, n_years)), axis=0)
+            uniforms = (strata + generator.random((TAILLE_BLOC_REPLICATS, n_years))) / TAILLE_BLOC_REPLICATS
+        else:
+            uniforms = qmc.Sobol(d=n_years, scramble=True, seed=generator).random(TAILLE_BLOC_REPLICATS)
+        return ndtri(np.clip(uniforms, 1e-12, 1 - 1e-12))
     
-    def _simulate_total_debt(self, dates):
-        """Simule la dette totale en devise locale"""
-        base_debt = self._convert_to_local_currency(self.config["budget_base"] * 0.90)  # Dette importante
-        
-        debt = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2005, 2010, 2015, 2020]:
-                change = 1.35  # Augmentation forte pendant les investissements
-            elif year in [2008, 2014, 2021]:
-                change = 0.85  # Réduction pendant les crises
-            else:
-                change = 1.0
-            
-            noise = np.random.normal(1, 0.12)
-            debt.append(base_debt * change * noise)
-        
-        return debt
+    def _simulate_indicators(self, years, n_replicates=None, first_replicate=0, dtype=np.float64):
+        """Simule tous les indicateurs: matrice (années × indicateurs) ou ensemble si n_replicates est fourni"""
+        deterministic = self._deterministic_matrix(years)
+        # Bruit multiplicatif N(1, volatilite) tiré d'un bloc pour tout le tableau
+        values = self._standard_noise(len(deterministic), n_replicates, first_replicate, dtype)
+        values *= self._sigmas
+        values += 1
+        values *= deterministic
+        return values
     
-    def _simulate_debt_ratio(self, dates):
-        """Simule le taux d'endettement"""
-        ratios = []
-        for i, date in enumerate(dates):
-            base_ratio = 0.82  # Endettement initial élevé
-            
-            year = date.year
-            if year >= 2010:
-                improvement = 1 - 0.008 * (year - 2010)  # Amélioration lente
-            else:
-                improvement = 1
-            
-            noise = np.random.normal(1, 0.09)
-            ratios.append(base_ratio * improvement * noise)
-        
-        return ratios
+    def simulate_ensemble(self, n_replicates=10000, first_replicate=0, dtype=np.float64):
+        """Simule un ensemble Monte Carlo (réplicats × années × indicateurs), chocs inclus"""
+        years = np.arange(self.start_year, self.end_year + 1)
+        paths = self._simulate_indicators(years, n_replicates, first_replicate, dtype)
+        paths *= compile_shock_matrix(years, COLONNES_INDICATEURS)
+        return years, paths
     
-    def _simulate_tax_rate(self, dates):
-        """Simule le taux de fiscalité (moyen)"""
-        rates = []
-        for i, date in enumerate(dates):
-            base_rate = 0.65  # Fiscalité initiale faible
-            
-            year = date.year
-            if year >= 2010:
-                increase = 1 + 0.004 * (year - 2010)  # Augmentation très lente
-            else:
-                increase = 1
-            
-            noise = np.random.normal(1, 0.05)
-            rates.append(base_rate * increase * noise)
-        
-        return rates
+    def iter_ensemble_chunks(self, n_replicates=10000, chunk_size=TAILLE_BLOC_REPLICATS, dtype=np.float64):
+        """Génère l'ensemble par morceaux de chunk_size réplicats, identiques à simulate_ensemble"""
+        for first in range(0, n_replicates, chunk_size):
+            years, paths = self.simulate_ensemble(min(chunk_size, n_replicates - first), first, dtype)
+            yield first, years, paths
     
-    def _simulate_agriculture_investment(self, dates):
-        """Simule l'investissement agricole (très important en Afrique)"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.12)  # Part importante
-        
-        # Ajustement selon les spécialités
-        multiplier = 1.8 if "agriculture" in self.config["specialites"] else 0.9
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2005, 2010, 2015, 2020]:
-                year_multiplier = 2.5  # Plans agricoles importants
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.040 * i
-            noise = np.random.normal(1, 0.20)
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
-        
-        return investment
+    def generate_ensemble_data(self, n_replicates=10000):
+        """Génère les bandes de l'ensemble Monte Carlo: moyenne, médiane, P5 et P95 par indicateur"""
+        print(f"🎲 Simulation de {n_replicates:,} réplicats pour {self.commune}, {self.pays}...")
+        years, paths = self.simulate_ensemble(n_replicates)
+        return summarize_ensemble(years, paths)
     
-    def _simulate_infrastructure_investment(self, dates):
-        """Simule l'investissement en infrastructures (priorité en Afrique)"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.15)  # Part très importante
-        
-        multiplier = 1.6 if "infrastructures" in self.config["specialites"] else 1.2
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2006, 2012, 2018, 2023]:
-                year_multiplier = 2.2
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.045 * i
-            noise = np.random.normal(1, 0.18)
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
-        
-        return investment
-    
-    def _simulate_health_investment(self, dates):
-        """Simule l'investissement en santé"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.08)
-        
-        multiplier = 1.7 if "sante" in self.config["specialites"] else 1.0
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2008, 2014, 2020]:
-                year_multiplier = 2.0
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.038 * i
-            noise = np.random.normal(1, 0.22)
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
-        
-        return investment
-    
-    def _simulate_education_investment(self, dates):
-        """Simule l'investissement éducatif"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.10)  # Part importante
-        
-        multiplier = 1.6 if "education" in self.config["specialites"] else 1.1
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2007, 2013, 2019]:
-                year_multiplier = 1.9
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.042 * i
-            noise = np.random.normal(1, 0.19)
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
-        
-        return investment
-    
-    def _simulate_water_investment(self, dates):
-        """Simule l'investissement en eau (priorité en Afrique)"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.06)
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2009, 2015, 2021]:
-                year_multiplier = 2.3  # Programmes eau très importants
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.035 * i
-            noise = np.random.normal(1, 0.21)
-            investment.append(base_investment * growth * year_multiplier * noise)
-        
-        return investment
-    
-    def _simulate_energy_investment(self, dates):
-        """Simule l'investissement en énergie"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.07)
-        
-        multiplier = 1.5 if "energie" in self.config["specialites"] else 1.0
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2010, 2016, 2022]:
-                year_multiplier = 2.1
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.040 * i
-            noise = np.random.normal(1, 0.20)
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
-        
-        return investment
+    def _add_african_trends(self, df):
+        """Ajoute des tendances réalistes adaptées au contexte africain"""
+        shocks = compile_shock_matrix(df['Annee'], COLONNES_INDICATEURS)
+        df[COLONNES_INDICATEURS] = df[COLONNES_INDICATEURS].to_numpy() * shocks
     
-    def _simulate_mining_investment(self, dates):
-        """Simule l'investissement minier (spécifique à l'Afrique)"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.05)
-        
-        multiplier = 2.5 if "mines" in self.config["specialites"] else 0.3
-        
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2008, 2014, 2020]:
-                year_multiplier = 3.0  # Investissements miniers massifs
-            else:
-                year_multiplier = 1.0
+    def create_financial_analysis(self, df, ensemble=None, profile="print", fmt="png", 
+                                  headless=False, insights=True):
+        """Crée une analyse complète des finances communales africaines"""
+        if profile not in PROFILS_RENDU:
+            raise ValueError(f"Profil de rendu inconnu: {profile} (choix: {', '.join(PROFILS_RENDU)})")
+        if fmt not in FORMATS_FIGURE:
+            raise ValueError(f"Format de figure inconnu: {fmt} (choix: {', '.join(FORMATS_FIGURE)})")
+        
+        # Figure déjà rendue pour ces données et ces options: simple copie
+        cache_key = cached = None
+        if self.cache is not None:
+            meta = dict(type_resultat='figure', commune=self.commune, pays=self.pays, 
+                        symbole=self.symbole, periode=[self.start_year, self.end_year], 
+                        donnees=frame_fingerprint(df), 
+                        ensemble=None if ensemble is None else [frame_fingerprint(ensemble[name]) 
+                                                                for name in sorted(ensemble)], 
+                        profile=profile, fmt=fmt, code=code_fingerprint())
+            cache_key = ResultCache.key(**meta)
+            cached = self.cache.get_file(cache_key, fmt)
+            if cached is not None:
+                shutil.copyfile(cached, self.figure_path(fmt))
+                print(f"♻️ Figure en cache pour {self.commune}, {self.pays}")
+        
+        # Hors mode headless, la figure est tracée pour être affichée, même en cache
+        if cached is None or not headless:
+            with self.instrumentation.stage("trace"):
+                fig = self._draw_figure(df, ensemble, profile, headless)
             
-            growth = 1 + 0.050 * i
-            noise = np.random.normal(1, 0.35)  # Extrême volatilité
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
+            if cached is None:
+                with self.instrumentation.stage("savefig"):
+                    # fig.savefig évite le redessin supplémentaire (draw_idle) de plt.savefig
+                    fig.savefig(self.figure_path(fmt), dpi=PROFILS_RENDU[profile]["dpi"], 
+                                bbox_inches='tight' if PROFILS_RENDU[profile]["marges"] is None else None)
+                if cache_key is not None:
+                    self.cache.put_file(cache_key, self.figure_path(fmt), fmt, **meta)
+            plt = _pyplot()
+            if not headless:
+                plt.show()
+            plt.close(fig)
         
-        return investment
+        # Générer les insights
+        if insights:
+            self._generate_financial_insights(df)
     
-    def _simulate_tourism_investment(self, dates):
-        """Simule l'investissement touristique"""
-        base_investment = self._convert_to_local_currency(self.config["budget_base"] * 0.04)
-        
-        multiplier = 2.0 if "tourisme" in self.config["specialites"] else 0.7
+    def _draw_figure(self, df, ensemble, profile, headless):
+        """Trace les huit graphiques de l'analyse et retourne la figure"""
+        if headless:
+            use_headless_backend()
+        plt = _pyplot()
+        rendu = PROFILS_RENDU[profile]
         
-        investment = []
-        for i, date in enumerate(dates):
-            year = date.year
-            if year in [2007, 2013, 2019, 2024]:
-                year_multiplier = 2.0
-            else:
-                year_multiplier = 1.0
-            
-            growth = 1 + 0.036 * i
-            noise = np.random.normal(1, 0.24)
-            investment.append(base_investment * growth * year_multiplier * multiplier * noise)
-        
-        return investment
-    
-    def _add_african_trends(self, df):
-        """Ajoute des tendances réalistes adaptées au contexte africain"""
-        for i, row in df.iterrows():
-            year = row['Annee']
-            
-            # Période de croissance économique (2002-2008)
-            if 2002 <= year <= 2008:
-                df.loc[i, 'Investissement_Infrastructures'] *= 1.4
-                df.loc[i, 'Aide_Internationale'] *= 1.3
-            
-            # Impact de la crise financière mondiale (2008-2009)
-            if 2008 <= year <= 2009:
-                df.loc[i, 'Recettes_Totales'] *= 0.88
-                df.loc[i, 'Investissement'] *= 0.65
-                df.loc[i, 'Aide_Internationale'] *= 1.25  # Augmentation de l'aide
-            
-            # Croissance forte post-crise (2010-2014)
-            elif 2010 <= year <= 2014:
-                df.loc[i, 'Investissement_Agriculture'] *= 1.3
-                df.loc[i, 'Investissement_Infrastructures'] *= 1.5
-            
-            # Baisse des cours des matières premières (2014-2016)
-            if 2014 <= year <= 2016:
-                df.loc[i, 'Investissement_Mines'] *= 0.6
-                df.loc[i, 'Recettes_Totales'] *= 0.92
-            
-            # Programme de développement continental (2017-2019)
-            if 2017 <= year <= 2019:
-                df.loc[i, 'Aide_Internationale'] *= 1.4
-                df.loc[i, 'Investissement_Eau'] *= 1.8
-                df.loc[i, 'Investissement_Energie'] *= 1.6
-            
-            # Impact de la crise COVID-19 (2020-2021)
-            if 2020 <= year <= 2021:
-                if year == 2020:
-                    df.loc[i, 'Recettes_Totales'] *= 0.78
-                    df.loc[i, 'Investissement_Tourisme'] *= 0.4
-                    df.loc[i, 'Aide_Internationale'] *= 1.35
-                else:
-                    df.loc[i, 'Subventions_Etat'] *= 1.20
-            
-            # Plan de relance post-COVID et Agenda 2063 (2022-2025)
-            if year >= 2022:
-                df.loc[i, 'Investissement_Infrastructures'] *= 1.25
-                df.loc[i, 'Investissement_Agriculture'] *= 1.30
-                df.loc[i, 'Investissement_Sante'] *= 1.40
-    
-    def create_financial_analysis(self, df):
-        """Crée une analyse complète des finances communales africaines"""
         plt.style.use('seaborn-v0_8')
-        fig = plt.figure(figsize=(20, 24))
+        fig = plt.figure(figsize=rendu["figsize"])
         
         # 1. Évolution des recettes et dépenses
         ax1 = plt.subplot(4, 2, 1)
-        self._plot_revenue_expenses(df, ax1)
+        self._plot_revenue_expenses(df, ax1, ensemble)
         
         # 2. Structure des recettes
         ax2 = plt.subplot(4, 2, 2)
@@ -748,11 +1267,11 @@ class AfriqueCommuneFinanceAnalyzer:
         
         # 4. Investissements communaux
         ax4 = plt.subplot(4, 2, 4)
-        self._plot_investments(df, ax4)
+        self._plot_investments(df, ax4, ensemble)
         
         # 5. Dette et endettement
         ax5 = plt.subplot(4, 2, 5)
-        self._plot_debt(df, ax5)
+        self._plot_debt(df, ax5, ensemble)
         
         # 6. Indicateurs de performance
         ax6 = plt.subplot(4, 2, 6)
@@ -768,15 +1287,31 @@ class AfriqueCommuneFinanceAnalyzer:
         
         plt.suptitle(f'Analyse des Comptes Communaux de {self.commune}, {self.pays} ({self.start_year}-{self.end_year})\n(En millions de {self.symbole})', 
                     fontsize=16, fontweight='bold')
-        plt.tight_layout()
-        plt.savefig(f'{self.commune}_{self.pays}_financial_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
-        # Générer les insights
-        self._generate_financial_insights(df)
+        if rendu["texte"] != 1.0:
+            # Canevas réduit: textes réduits d'autant pour garder la mise en page
+            from matplotlib.text import Text
+            for text in fig.findobj(Text):
+                text.set_fontsize(text.get_fontsize() * rendu["texte"])
+        if rendu["marges"] is None:
+            plt.tight_layout()
+        else:
+            fig.subplots_adjust(**rendu["marges"])
+        return fig
     
-    def _plot_revenue_expenses(self, df, ax):
+    def _plot_fan(self, ax, ensemble, column, color):
+        """Trace la bande P5-P95 et la médiane d'un indicateur de l'ensemble"""
+        if ensemble is None:
+            return
+        years = ensemble['mediane']['Annee']
+        ax.fill_between(years, ensemble['p5'][column], ensemble['p95'][column], 
+                       color=color, alpha=0.15, linewidth=0)
+        ax.plot(years, ensemble['mediane'][column], color=color, linewidth=1, 
+               linestyle='--', alpha=0.8)
+    
+    def _plot_revenue_expenses(self, df, ax, ensemble=None):
         """Plot de l'évolution des recettes et dépenses"""
+        self._plot_fan(ax, ensemble, 'Recettes_Totales', '#008000')
+        self._plot_fan(ax, ensemble, 'Depenses_Totales', '#DC143C')
         ax.plot(df['Annee'], df['Recettes_Totales'], label='Recettes Totales', 
                linewidth=2, color='#008000', alpha=0.8)
         ax.plot(df['Annee'], df['Depenses_Totales'], label='Dépenses Totales', 
@@ -826,8 +1361,10 @@ class AfriqueCommuneFinanceAnalyzer:
         ax.legend()
         ax.grid(True, alpha=0.3, axis='y')
     
-    def _plot_investments(self, df, ax):
+    def _plot_investments(self, df, ax, ensemble=None):
         """Plot des investissements communaux"""
+        self._plot_fan(ax, ensemble, 'Investissement_Agriculture', '#008000')
+        self._plot_fan(ax, ensemble, 'Investissement_Infrastructures', '#FFD700')
         ax.plot(df['Annee'], df['Investissement_Agriculture'], label='Agriculture', 
                linewidth=2, color='#008000', alpha=0.8)
         ax.plot(df['Annee'], df['Investissement_Infrastructures'], label='Infrastructures', 
@@ -847,7 +1384,7 @@ class AfriqueCommuneFinanceAnalyzer:
         ax.legend()
         ax.grid(True, alpha=0.3)
     
-    def _plot_debt(self, df, ax):
+    def _plot_debt(self, df, ax, ensemble=None):
         """Plot de la dette et du taux d'endettement"""
         # Dette totale
         ax.bar(df['Annee'], df['Dette_Totale'], label=f'Dette Totale (millions {self.symbole})', 
@@ -860,6 +1397,7 @@ class AfriqueCommuneFinanceAnalyzer:
         
         # Taux d'endettement en second axe
         ax2 = ax.twinx()
+        self._plot_fan(ax2, ensemble, 'Taux_Endettement', '#DC143C')
         ax2.plot(df['Annee'], df['Taux_Endettement'], label='Taux d\'Endettement', 
                 linewidth=3, color='#DC143C')
         ax2.set_ylabel('Taux d\'Endettement', color='#DC143C')
@@ -941,104 +1479,1210 @@ class AfriqueCommuneFinanceAnalyzer:
         ax.legend()
         ax.grid(True, alpha=0.3, axis='y')
     
+    def compute_financial_insights(self, df):
+        """Calcule les insights de la commune en une passe d'agrégation (dictionnaire sérialisable en JSON)"""
+        with self.instrumentation.stage("insights"):
+            return self._compute_financial_insights(df)
+    
+    def _compute_financial_insights(self, df):
+        """Agrégation des insights (voir compute_financial_insights)"""
+        columns = df[COLONNES_INSIGHTS]
+        stats = pd.concat({'mean': columns.mean(), 'first': columns.iloc[0], 'last': columns.iloc[-1]})
+        stats = stats.swaplevel().to_frame().T
+        metrics = _insight_metrics(stats).iloc[0]
+        return financial_insights_record(metrics, self.pays, self.commune, self.config, 
+                                         self.devise_config, (self.start_year, self.end_year))
+    
+    def forecast(self, df, horizon=5, method="ets", indicators=None, alpha=0.05, workers=1):
+        """Projette les indicateurs au-delà de end_year (voir forecast_panel)"""
+        panel = df.assign(pays=self.pays, commune=self.commune)
+        with self.instrumentation.stage("previsions"):
+            return forecast_panel(panel, horizon, method, indicators, alpha, workers, self.cache)
+    
     def _generate_financial_insights(self, df):
         """Génère des insights analytiques adaptés au contexte africain"""
-        print(f"🏛️ INSIGHTS ANALYTIQUES - Commune de {self.commune}, {self.pays}")
-        print("=" * 60)
-        
-        # 1. Statistiques de base
-        print(f"\n1. 📈 STATISTIQUES GÉNÉRALES ({self.symbole}):")
-        avg_revenue = df['Recettes_Totales'].mean()
-        avg_expenses = df['Depenses_Totales'].mean()
-        avg_savings = df['Epargne_Brute'].mean()
-        avg_debt = df['Dette_Totale'].mean()
-        
-        print(f"Recettes moyennes annuelles: {avg_revenue:,.0f} millions {self.symbole}")
-        print(f"Dépenses moyennes annuelles: {avg_expenses:,.0f} millions {self.symbole}")
-        print(f"Épargne brute moyenne: {avg_savings:,.0f} millions {self.symbole}")
-        print(f"Dette moyenne: {avg_debt:,.0f} millions {self.symbole}")
-        
-        # 2. Croissance (très forte en Afrique)
-        print("\n2. 📊 TAUX DE CROISSANCE:")
-        revenue_growth = ((df['Recettes_Totales'].iloc[-1] / 
-                          df['Recettes_Totales'].iloc[0]) - 1) * 100
-        population_growth = ((df['Population'].iloc[-1] / 
-                             df['Population'].iloc[0]) - 1) * 100
-        
-        print(f"Croissance des recettes ({self.start_year}-{self.end_year}): {revenue_growth:.1f}%")
-        print(f"Croissance de la population ({self.start_year}-{self.end_year}): {population_growth:.1f}%")
-        
-        # 3. Structure financière (spécificités africaines)
-        print("\n3. 📋 STRUCTURE FINANCIÈRE:")
-        tax_share = (df['Impots_Locaux'].mean() / df['Recettes_Totales'].mean()) * 100
-        state_share = (df['Subventions_Etat'].mean() / df['Recettes_Totales'].mean()) * 100
-        aid_share = (df['Aide_Internationale'].mean() / df['Recettes_Totales'].mean()) * 100
-        investment_share = (df['Investissement'].mean() / df['Depenses_Totales'].mean()) * 100
-        
-        print(f"Part des impôts locaux dans les recettes: {tax_share:.1f}%")
-        print(f"Part des subventions de l'État dans les recettes: {state_share:.1f}%")
-        print(f"Part de l'aide internationale dans les recettes: {aid_share:.1f}%")
-        print(f"Part de l'investissement dans les dépenses: {investment_share:.1f}%")
-        
-        # 4. Dette et fiscalité
-        print("\n4. 💰 ENDETTEMENT ET FISCALITÉ:")
-        avg_debt_ratio = df['Taux_Endettement'].mean() * 100
-        avg_tax_rate = df['Taux_Fiscalite'].mean()
-        last_debt_ratio = df['Taux_Endettement'].iloc[-1] * 100
-        
-        print(f"Taux d'endettement moyen: {avg_debt_ratio:.1f}%")
-        print(f"Taux d'endettement final: {last_debt_ratio:.1f}%")
-        print(f"Taux de fiscalité moyen: {avg_tax_rate:.2f}")
-        
-        # 5. Spécificités de la commune africaine
-        print(f"\n5. 🌟 SPÉCIFICITÉS DE {self.commune.upper()} ({self.pays.upper()}):")
-        print(f"Type de commune: {self.config['type']}")
-        print(f"Spécialités: {', '.join(self.config['specialites'])}")
-        print(f"Devise: {self.devise} ({self.symbole})")
-        
-        # 6. Événements marquants spécifiques à l'Afrique
-        print("\n6. 📅 ÉVÉNEMENTS MARQUANTS AFRIQUE:")
-        print("• 2002-2008: Période de croissance économique soutenue")
-        print("• 2008-2009: Impact de la crise financière mondiale")
-        print("• 2010-2014: Croissance post-crise et investissements")
-        print("• 2014-2016: Baisse des cours des matières premières")
-        print("• 2017-2019: Programmes de développement continental")
-        print("• 2020-2021: Impact de la crise COVID-19")
-        print("• 2022-2025: Plan de relance et Agenda 2063")
-        
-        # 7. Recommandations adaptées au contexte africain
-        print("\n7. 💡 RECOMMANDATIONS STRATÉGIQUES:")
-        if "agriculture" in self.config["specialites"]:
-            print("• Moderniser l'agriculture et développer l'agro-industrie")
-            print("• Valoriser les filières agricoles locales")
-        if "mines" in self.config["specialites"]:
-            print("• Développer la transformation locale des minerais")
-            print("• Renforcer la responsabilité sociale des entreprises minières")
-        if "tourisme" in self.config["specialites"]:
-            print("• Promouvoir l'écotourisme et le tourisme culturel")
-            print("• Développer les infrastructures d'accueil")
-        print("• Investir dans les infrastructures de base (eau, électricité, routes)")
-        print("• Renforcer les systèmes de santé et d'éducation")
-        print("• Développer l'économie numérique et les technologies")
-        print("• Promouvoir l'entreprenariat local et les PME")
-        print("• Renforcer la gouvernance locale et la transparence")
-
-def main():
-    """Fonction principale pour l'Afrique"""
-    # Liste des pays et communes africaines
-    communes_par_pays = {
-        "Sénégal": ["Dakar", "Saint-Louis", "Tamba", "Thiès", "Kaolack"],
-        "Côte d'Ivoire": ["Abidjan", "Bouaké", "Korhogo", "Yamoussoukro", "San-Pédro"],
-        "Cameroun": ["Yaoundé", "Douala", "Garoua", "Bafoussam", "Maroua"],
-        "Nigeria": ["Lagos", "Abuja", "Kano", "Ibadan", "Port Harcourt"],
-        "Ghana": ["Accra", "Kumasi", "Tamale", "Sekondi-Takoradi", "Cape Coast"],
-        "Kenya": ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret"],
-        "RDC": ["Kinshasa", "Lubumbashi", "Mbuji-Mayi", "Kananga", "Kisangani"],
-        "Afrique du Sud": ["Johannesburg", "Cape Town", "Durban", "Pretoria", "Port Elizabeth"],
-        "Maroc": ["Casablanca", "Marrakech", "Fès", "Tanger", "Rabat"],
-        "Algérie": ["Alger", "Oran", "Constantine", "Annaba", "Batna"],
-        "Tunisie": ["Tunis", "Sfax", "Sousse", "Kairouan", "Bizerte"]
+        insights = self.compute_financial_insights(df)
+        print_financial_insights(insights)
+        return insights
+
+# Événements marquants et recommandations des insights
+EVENEMENTS_AFRIQUE = [
+    "2002-2008: Période de croissance économique soutenue",
+    "2008-2009: Impact de la crise financière mondiale",
+    "2010-2014: Croissance post-crise et investissements",
+    "2014-2016: Baisse des cours des matières premières",
+    "2017-2019: Programmes de développement continental",
+    "2020-2021: Impact de la crise COVID-19",
+    "2022-2025: Plan de relance et Agenda 2063",
+]
+RECOMMANDATIONS_SPECIALITES = {
+    "agriculture": ["Moderniser l'agriculture et développer l'agro-industrie", 
+                    "Valoriser les filières agricoles locales"],
+    "mines": ["Développer la transformation locale des minerais", 
+              "Renforcer la responsabilité sociale des entreprises minières"],
+    "tourisme": ["Promouvoir l'écotourisme et le tourisme culturel", 
+                 "Développer les infrastructures d'accueil"],
+}
+RECOMMANDATIONS_GENERALES = [
+    "Investir dans les infrastructures de base (eau, électricité, routes)",
+    "Renforcer les systèmes de santé et d'éducation",
+    "Développer l'économie numérique et les technologies",
+    "Promouvoir l'entreprenariat local et les PME",
+    "Renforcer la gouvernance locale et la transparence",
+]
+
+# Colonnes agrégées par le moteur d'insights
+COLONNES_INSIGHTS = ['Recettes_Totales', 'Depenses_Totales', 'Epargne_Brute', 'Dette_Totale', 
+                     'Population', 'Impots_Locaux', 'Subventions_Etat', 'Aide_Internationale', 
+                     'Investissement', 'Taux_Endettement', 'Taux_Fiscalite']
+
+
+def _insight_metrics(stats):
+    """Indicateurs d'insights vectorisés à partir des agrégats par commune (moyenne, première et dernière valeur)"""
+    mean = stats.xs('mean', axis=1, level=1)
+    first = stats.xs('first', axis=1, level=1)
+    last = stats.xs('last', axis=1, level=1)
+    return pd.DataFrame({
+        # Statistiques de base
+        "recettes_moyennes": mean['Recettes_Totales'],
+        "depenses_moyennes": mean['Depenses_Totales'],
+        "epargne_brute_moyenne": mean['Epargne_Brute'],
+        "dette_moyenne": mean['Dette_Totale'],
+        # Croissance
+        "croissance_recettes_pct": (last['Recettes_Totales'] / first['Recettes_Totales'] - 1) * 100,
+        "croissance_population_pct": (last['Population'] / first['Population'] - 1) * 100,
+        # Structure financière
+        "part_impots_locaux_pct": mean['Impots_Locaux'] / mean['Recettes_Totales'] * 100,
+        "part_subventions_etat_pct": mean['Subventions_Etat'] / mean['Recettes_Totales'] * 100,
+        "part_aide_internationale_pct": mean['Aide_Internationale'] / mean['Recettes_Totales'] * 100,
+        "part_investissement_depenses_pct": mean['Investissement'] / mean['Depenses_Totales'] * 100,
+        # Dette et fiscalité
+        "taux_endettement_moyen_pct": mean['Taux_Endettement'] * 100,
+        "taux_endettement_final_pct": last['Taux_Endettement'] * 100,
+        "taux_fiscalite_moyen": mean['Taux_Fiscalite'],
+    }, index=stats.index)
+
+
+def recommendations(specialites):
+    """Recommandations stratégiques selon les spécialités de la commune"""
+    specifiques = [text for specialite, texts in RECOMMANDATIONS_SPECIALITES.items() 
+                   if specialite in specialites for text in texts]
+    return specifiques + RECOMMANDATIONS_GENERALES
+
+
+def financial_insights_record(metrics, pays, commune, config, devise_config, periode):
+    """Assemble l'enregistrement d'insights d'une commune (types Python natifs)"""
+    metrics = {name: float(value) for name, value in metrics.items()}
+    return {
+        "pays": pays,
+        "commune": commune,
+        "periode": list(periode),
+        "devise": devise_config["devise"],
+        "symbole": devise_config["symbole"],
+        "type": config["type"],
+        "specialites": list(config["specialites"]),
+        "statistiques": {name: metrics[name] for name in 
+                         ("recettes_moyennes", "depenses_moyennes", "epargne_brute_moyenne", "dette_moyenne")},
+        "croissance": {name: metrics[name] for name in 
+                       ("croissance_recettes_pct", "croissance_population_pct")},
+        "structure": {name: metrics[name] for name in 
+                      ("part_impots_locaux_pct", "part_subventions_etat_pct", 
+                       "part_aide_internationale_pct", "part_investissement_depenses_pct")},
+        "endettement": {name: metrics[name] for name in 
+                        ("taux_endettement_moyen_pct", "taux_endettement_final_pct", "taux_fiscalite_moyen")},
+        "evenements": list(EVENEMENTS_AFRIQUE),
+        "recommandations": recommendations(config["specialites"]),
+    }
+
+
+def compute_panel_insights(panel):
+    """Indicateurs d'insights de toutes les communes d'un panel, indexés par (pays, commune)"""
+    ordered = panel.sort_values(['pays', 'commune', 'Annee'])
+    stats = ordered.groupby(['pays', 'commune'], sort=False, observed=True)[COLONNES_INSIGHTS].agg(
+        ['mean', 'first', 'last'])
+    return _insight_metrics(stats)
+
+
+def panel_insights_records(panel, registry=None):
+    """Enregistrements d'insights (comme compute_financial_insights) pour chaque commune d'un panel"""
+    registry = registry if registry is not None else get_registry()
+    periode = (int(panel['Annee'].min()), int(panel['Annee'].max()))
+    return [financial_insights_record(row, pays, commune, registry.commune_config(commune, pays), 
+                                      registry.devise(pays), periode) 
+            for (pays, commune), row in compute_panel_insights(panel).iterrows()]
+
+
+# Méthodes de prévision disponibles (statsmodels)
+METHODES_PREVISION = ("ets", "arima")
+
+
+def forecast_series(values, years, horizon=5, method="ets", alpha=0.05):
+    """Prévision ETS ou ARIMA d'une série annuelle avec intervalle à 1 - alpha (NaN si l'ajustement échoue)"""
+    if method not in METHODES_PREVISION:
+        raise ValueError(f"Méthode de prévision inconnue: {method} (choix: {', '.join(METHODES_PREVISION)})")
+    series = pd.Series(np.asarray(values, dtype=float))
+    future = np.arange(int(years[-1]) + 1, int(years[-1]) + 1 + horizon)
+    forecast = pd.DataFrame({'Annee': future, 'prevision': np.nan, 'borne_basse': np.nan, 'borne_haute': np.nan})
+    
+    # Import hors du bloc: statsmodels réactive ses avertissements à l'import
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+    from statsmodels.tsa.arima.model import ARIMA
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            if method == "ets":
+                fit = ETSModel(series, error='add', trend='add').fit(disp=False)
+                frame = fit.get_prediction(start=len(series), end=len(series) + horizon - 1).summary_frame(alpha=alpha)
+                columns = ['mean', 'pi_lower', 'pi_upper']
+            else:
+                fit = ARIMA(series, order=(1, 1, 0), trend='t').fit()
+                frame = fit.get_forecast(horizon).summary_frame(alpha=alpha)
+                columns = ['mean', 'mean_ci_lower', 'mean_ci_upper']
+        except (ValueError, np.linalg.LinAlgError):
+            return forecast
+    forecast[['prevision', 'borne_basse', 'borne_haute']] = frame[columns].to_numpy()
+    return forecast
+
+
+def _forecast_task(key, years, values, horizon, method, alpha):
+    """Tâche de prévision exécutable dans un processus"""
+    return key, forecast_series(values, years, horizon, method, alpha)
+
+
+def forecast_panel(panel, horizon=5, method="ets", indicators=None, alpha=0.05, workers=None, cache=None):
+    """Prévisions de chaque indicateur de chaque commune d'un panel, en parallèle et en cache par commune"""
+    indicators = indicators or COLONNES_INDICATEURS
+    workers = workers or os.cpu_count() or 1
+    ordered = panel.sort_values(['pays', 'commune', 'Annee'])
+    columns = ['pays', 'commune', 'indicateur', 'Annee', 'prevision', 'borne_basse', 'borne_haute']
+    
+    communes, tasks, cache_keys = {}, [], {}
+    for (pays, commune), group in ordered.groupby(['pays', 'commune'], sort=False, observed=True):
+        years = group['Annee'].to_numpy()
+        values = group[indicators].to_numpy(dtype=float)
+        communes[(pays, commune)] = None
+        if cache is not None:
+            cache_keys[(pays, commune)] = ResultCache.key(
+                type_resultat='prevision', pays=pays, commune=commune, indicateurs=list(indicators), 
+                valeurs=hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest(), 
+                annees=[int(years[0]), int(years[-1])], horizon=horizon, methode=method, alpha=alpha, 
+                code=code_fingerprint())
+            cached = cache.get_frame(cache_keys[(pays, commune)])
+            if cached is not None:
+                communes[(pays, commune)] = cached
+                continue
+        for k, indicator in enumerate(indicators):
+            tasks.append(((pays, commune, indicator), years, values[:, k], horizon, method, alpha))
+    
+    if workers == 1 or len(tasks) <= 1:
+        fitted = [_forecast_task(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            fitted = list(executor.map(_forecast_task, *zip(*tasks), chunksize=max(1, len(tasks) // (4 * workers))))
+    
+    # Regroupe les ajustements par commune (dans l'ordre des indicateurs), une entrée de cache chacune
+    fitted_by_commune = {}
+    for (pays, commune, indicator), forecast in fitted:
+        fitted_by_commune.setdefault((pays, commune), []).append(
+            forecast.assign(pays=pays, commune=commune, indicateur=indicator))
+    for key, frames in fitted_by_commune.items():
+        communes[key] = pd.concat(frames, ignore_index=True)[columns]
+        if cache is not None:
+            cache.put_frame(cache_keys[key], communes[key], type_resultat='prevision', 
+                            pays=key[0], commune=key[1])
+    
+    if not communes:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(communes.values(), ignore_index=True)[columns]
+
+
+# Indicateurs de la comparaison inter-communes (moyennes sur la période): totaux en millions d'euros,
+# montants par habitant en euros
+INDICATEURS_COMPARAISON = {
+    "recettes_eur": "Recettes_Totales_EUR",
+    "depenses_eur": "Depenses_Totales_EUR",
+    "dette_eur": "Dette_Totale_EUR",
+    "recettes_par_habitant_eur": "Recettes_Totales_EUR_par_habitant",
+    "depenses_par_habitant_eur": "Depenses_Totales_EUR_par_habitant",
+    "investissement_par_habitant_eur": "Investissement_EUR_par_habitant",
+    "dette_par_habitant_eur": "Dette_Totale_EUR_par_habitant",
+    "epargne_par_habitant_eur": "Epargne_Brute_EUR_par_habitant",
+    "taux_endettement": "Taux_Endettement",
+    "taux_fiscalite": "Taux_Fiscalite",
+}
+
+
+def _registry_lookup(keys, lookup):
+    """Applique lookup une seule fois par valeur distincte, puis diffuse sur toutes les lignes"""
+    codes, uniques = pd.factorize(keys)
+    return np.array([lookup(value) for value in uniques])[codes]
+
+
+def normalize_panel(panel, registry=None):
+    """Ajoute au panel les montants en millions d'euros (_EUR) et en euros par habitant (_EUR_par_habitant)"""
+    registry = registry if registry is not None else get_registry()
+    symboles = _registry_lookup(panel['pays'], lambda pays: registry.devise(pays)["symbole"])
+    rates = registry.fx.panel_rates(symboles, panel['Annee'])
+    amounts = panel[COLONNES_MONTANTS].to_numpy(dtype=float) / rates[:, None]
+    # Montants en millions: ramenés en euros avant la division par la population
+    per_capita = amounts * 1e6 / panel['Population'].to_numpy(dtype=float)[:, None]
+    normalized = pd.concat([
+        panel,
+        pd.DataFrame(amounts, columns=[f'{column}_EUR' for column in COLONNES_MONTANTS], index=panel.index),
+        pd.DataFrame(per_capita, columns=[f'{column}_EUR_par_habitant' for column in COLONNES_MONTANTS], 
+                     index=panel.index),
+    ], axis=1)
+    normalized['type'] = _registry_lookup(
+        list(zip(panel['pays'], panel['commune'])), 
+        lambda key: registry.commune_config(key[1], key[0])["type"])
+    return normalized
+
+
+def compare_communes(panel, annee=None, registry=None):
+    """Compare les communes d'un panel: indicateurs normalisés, rangs et écarts en % à la médiane du même type"""
+    normalized = normalize_panel(panel, registry)
+    if annee is not None:
+        normalized = normalized[normalized['Annee'] == annee]
+    columns = list(INDICATEURS_COMPARAISON.values())
+    comparison = normalized.groupby(['pays', 'commune', 'type'], sort=False, observed=True)[columns].mean()
+    comparison.columns = list(INDICATEURS_COMPARAISON)
+    comparison = comparison.reset_index(level='type')
+    
+    metrics = list(INDICATEURS_COMPARAISON)
+    ranks = comparison[metrics].rank(ascending=False, method='min').astype(int)
+    peer_median = comparison.groupby('type')[metrics].transform('median')
+    deviation = (comparison[metrics] / peer_median - 1) * 100
+    return pd.concat([
+        comparison,
+        ranks.add_prefix('rang_'),
+        deviation.add_prefix('ecart_pairs_pct_'),
+    ], axis=1)
+
+
+def peer_group_statistics(comparison, metrics=None):
+    """Statistiques par groupe de pairs (type de commune): effectif, moyenne, médiane, min, max"""
+    metrics = metrics or list(INDICATEURS_COMPARAISON)
+    return comparison.groupby('type')[metrics].agg(['count', 'mean', 'median', 'min', 'max'])
+
+
+def print_financial_insights(insights):
+    """Affiche un enregistrement d'insights (rendu texte)"""
+    symbole = insights["symbole"]
+    start_year, end_year = insights["periode"]
+    stats = insights["statistiques"]
+    croissance = insights["croissance"]
+    structure = insights["structure"]
+    endettement = insights["endettement"]
+    
+    print(f"🏛️ INSIGHTS ANALYTIQUES - Commune de {insights['commune']}, {insights['pays']}")
+    print("=" * 60)
+    
+    # 1. Statistiques de base
+    print(f"\n1. 📈 STATISTIQUES GÉNÉRALES ({symbole}):")
+    print(f"Recettes moyennes annuelles: {stats['recettes_moyennes']:,.0f} millions {symbole}")
+    print(f"Dépenses moyennes annuelles: {stats['depenses_moyennes']:,.0f} millions {symbole}")
+    print(f"Épargne brute moyenne: {stats['epargne_brute_moyenne']:,.0f} millions {symbole}")
+    print(f"Dette moyenne: {stats['dette_moyenne']:,.0f} millions {symbole}")
+    
+    # 2. Croissance (très forte en Afrique)
+    print("\n2. 📊 TAUX DE CROISSANCE:")
+    print(f"Croissance des recettes ({start_year}-{end_year}): {croissance['croissance_recettes_pct']:.1f}%")
+    print(f"Croissance de la population ({start_year}-{end_year}): {croissance['croissance_population_pct']:.1f}%")
+    
+    # 3. Structure financière (spécificités africaines)
+    print("\n3. 📋 STRUCTURE FINANCIÈRE:")
+    print(f"Part des impôts locaux dans les recettes: {structure['part_impots_locaux_pct']:.1f}%")
+    print(f"Part des subventions de l'État dans les recettes: {structure['part_subventions_etat_pct']:.1f}%")
+    print(f"Part de l'aide internationale dans les recettes: {structure['part_aide_internationale_pct']:.1f}%")
+    print(f"Part de l'investissement dans les dépenses: {structure['part_investissement_depenses_pct']:.1f}%")
+    
+    # 4. Dette et fiscalité
+    print("\n4. 💰 ENDETTEMENT ET FISCALITÉ:")
+    print(f"Taux d'endettement moyen: {endettement['taux_endettement_moyen_pct']:.1f}%")
+    print(f"Taux d'endettement final: {endettement['taux_endettement_final_pct']:.1f}%")
+    print(f"Taux de fiscalité moyen: {endettement['taux_fiscalite_moyen']:.2f}")
+    
+    # 5. Spécificités de la commune africaine
+    print(f"\n5. 🌟 SPÉCIFICITÉS DE {insights['commune'].upper()} ({insights['pays'].upper()}):")
+    print(f"Type de commune: {insights['type']}")
+    print(f"Spécialités: {', '.join(insights['specialites'])}")
+    print(f"Devise: {insights['devise']} ({symbole})")
+    
+    # 6. Événements marquants spécifiques à l'Afrique
+    print("\n6. 📅 ÉVÉNEMENTS MARQUANTS AFRIQUE:")
+    for evenement in insights["evenements"]:
+        print(f"• {evenement}")
+    
+    # 7. Recommandations adaptées au contexte africain
+    print("\n7. 💡 RECOMMANDATIONS STRATÉGIQUES:")
+    for recommandation in insights["recommandations"]:
+        print(f"• {recommandation}")
+
+
+def select_communes(pays="all", communes="all"):
+    """Retourne les couples (pays, commune) sélectionnés ("all", un nom ou une liste de noms)"""
+    if isinstance(pays, str) and pays != "all":
+        pays = [pays]
+    if isinstance(communes, str) and communes != "all":
+        communes = [communes]
+    communes_par_pays = get_registry().communes_par_pays()
+    pays_liste = list(communes_par_pays) if pays == "all" else list(pays)
+    selection = []
+    for nom_pays in pays_liste:
+        if nom_pays not in communes_par_pays:
+            print(f"⚠️ Pays inconnu ignoré: {nom_pays}")
+            continue
+        for commune in communes_par_pays[nom_pays]:
+            if communes == "all" or commune in communes:
+                selection.append((nom_pays, commune))
+    if communes != "all":
+        connues = {commune for _, commune in selection}
+        for commune in communes:
+            if commune not in connues:
+                print(f"⚠️ Commune inconnue ignorée: {commune}")
+    return selection
+
+
+def _generate_commune(pays, commune, seed=None):
+    """Génère les données d'une commune (fonction exécutable dans un processus)"""
+    return AfriqueCommuneFinanceAnalyzer(commune, pays, seed=seed).generate_financial_data()
+
+
+def iter_communes(selection, seed=None, workers=1, prefetch=None):
+    """Génère paresseusement (pays, commune, DataFrame) dans l'ordre de la sélection, au plus prefetch en cours"""
+    selection = iter(selection)
+    if workers == 1:
+        for pays, commune in selection:
+            yield pays, commune, _generate_commune(pays, commune, seed)
+        return
+    
+    prefetch = prefetch or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for pays, commune in selection:
+            pending.append((pays, commune, executor.submit(_generate_commune, pays, commune, seed)))
+            if len(pending) >= prefetch:
+                pays_done, commune_done, future = pending.popleft()
+                yield pays_done, commune_done, future.result()
+        while pending:
+            pays_done, commune_done, future = pending.popleft()
+            yield pays_done, commune_done, future.result()
+
+
+def iter_ensembles(selection, n_replicates=10000, chunk_size=TAILLE_BLOC_REPLICATS, seed=None):
+    """Génère paresseusement (pays, commune, premier réplicat, années, morceau) de l'ensemble de chaque commune"""
+    for pays, commune in selection:
+        analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, seed=seed)
+        for first, years, paths in analyzer.iter_ensemble_chunks(n_replicates, chunk_size):
+            yield pays, commune, first, years, paths
+
+
+def _accumulate_replicates(pays, commune, seed, first, last, chunk_size=TAILLE_BLOC_REPLICATS, sampling="mc"):
+    """Accumulateur des réplicats [first, last) d'une commune (tâche de processus)"""
+    analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, seed=seed, sampling=sampling)
+    accumulator = None
+    for start in range(first, last, chunk_size):
+        years, paths = analyzer.simulate_ensemble(min(chunk_size, last - start), start)
+        accumulator = accumulator or EnsembleAccumulator(years)
+        accumulator.update(paths)
+    return accumulator
+
+
+def ensemble_statistics(pays, commune, n_replicates=100000, seed=None, workers=1, 
+                        chunk_size=TAILLE_BLOC_REPLICATS, sampling="mc"):
+    """Statistiques en flux de l'ensemble d'une commune, réparties sur workers processus (voir EnsembleAccumulator)"""
+    if n_replicates <= 0:
+        raise ValueError(f"Nombre de réplicats invalide: {n_replicates} (au moins 1)")
+    seed = np.random.SeedSequence(seed).entropy
+    # Plages alignées sur les blocs de tirage
+    per_worker = -(-n_replicates // (workers * TAILLE_BLOC_REPLICATS)) * TAILLE_BLOC_REPLICATS
+    ranges = [(first, min(first + per_worker, n_replicates)) for first in range(0, n_replicates, per_worker)]
+    if workers == 1 or len(ranges) == 1:
+        partials = [_accumulate_replicates(pays, commune, seed, first, last, chunk_size, sampling) 
+                    for first, last in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(_accumulate_replicates, *zip(*[
+                (pays, commune, seed, first, last, chunk_size, sampling) for first, last in ranges])))
+    accumulator = partials[0]
+    for partial in partials[1:]:
+        accumulator.merge(partial)
+    return accumulator
+
+
+def convergence_diagnostic(pays, commune, methods=METHODES_ECHANTILLONNAGE, replicates=(1024, 4096), 
+                           repeats=20, seed=0, indicators=None):
+    """Erreur relative et efficacité (par rapport à mc) des estimations d'ensemble de chaque méthode d'échantillonnage"""
+    columns = [COLONNES_INDICATEURS.index(column) for column in (indicators or COLONNES_INDICATEURS)]
+    seeds = np.random.SeedSequence(seed).generate_state(repeats)
+    names = ("moyenne", "p5", "mediane", "p95")
+    rows = []
+    for n_replicates in replicates:
+        spreads, levels = {}, {}
+        for method in methods:
+            estimates = []
+            for repeat_seed in seeds:
+                analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, seed=int(repeat_seed), sampling=method)
+                paths = analyzer.simulate_ensemble(n_replicates)[1][:, :, columns]
+                estimates.append(np.concatenate([paths.mean(axis=0)[None], 
+                                                 np.percentile(paths, [5, 50, 95], axis=0)]))
+            estimates = np.array(estimates)  # répétitions × statistiques × années × indicateurs
+            levels[method] = np.abs(estimates.mean(axis=0))
+            # Un écart au niveau du bruit d'arrondi est une estimation exacte (écart nul)
+            spread = estimates.std(axis=0, ddof=1)
+            spreads[method] = np.where(spread <= TOLERANCE_ESTIMATION_EXACTE * levels[method], 0.0, spread)
+        
+        # Cellules aléatoires pour au moins une méthode: les cellules sans bruit n'informent pas
+        informative = np.any([spreads[method] > 1e-9 * levels[method] for method in methods], axis=0)
+        for method in methods:
+            for i, name in enumerate(names):
+                mask = informative[i]
+                row = {"methode": method, "replicats": n_replicates, "statistique": name, 
+                       "erreur_relative": 0.0, "efficacite": np.nan, "exacte": True}
+                if mask.any():
+                    row["erreur_relative"] = float(np.median(spreads[method][i][mask] / levels[method][i][mask]))
+                    row["exacte"] = row["erreur_relative"] == 0.0
+                if method == "mc":
+                    row["efficacite"] = 1.0
+                elif "mc" in spreads and mask.any():
+                    if row["exacte"]:
+                        # Estimation exacte (ex. moyenne antithétique): efficacité infinie
+                        row["efficacite"] = np.inf
+                    else:
+                        reference, spread = spreads["mc"][i][mask], spreads[method][i][mask]
+                        with np.errstate(divide='ignore', invalid='ignore'):
+                            ratio = np.where(spread > 0, reference ** 2 / spread ** 2, np.inf)
+                        row["efficacite"] = float(np.median(ratio))
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class EnsembleStore:
+    """Stockage disque d'ensembles Monte Carlo (un .npy memmap par commune), écrit et lu par morceaux"""
+    
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, 'store.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.years = np.array(self.meta["annees"])
+        self.columns = self.meta["indicateurs"]
+        self.n_replicates = self.meta["replicats"]
+        self.dtype = np.dtype(self.meta["dtype"])
+        self._index = {tuple(key): i for i, key in enumerate(self.meta["communes"])}
+    
+    @classmethod
+    def create(cls, root, selection, n_replicates, start_year=2002, end_year=2025, dtype=np.float32, 
+               sampling="mc"):
+        """Crée un stockage vide pour les communes de selection"""
+        os.makedirs(root, exist_ok=True)
+        meta = {"communes": [list(key) for key in selection], 
+                "annees": list(range(start_year, end_year + 1)), 
+                "indicateurs": COLONNES_INDICATEURS, 
+                "replicats": int(n_replicates), 
+                "dtype": np.dtype(dtype).name, 
+                "graine": None, 
+                "echantillonnage": sampling, 
+                "terminees": []}
+        with open(os.path.join(root, 'store.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return cls(root)
+    
+    @classmethod
+    def open_or_create(cls, root, selection, n_replicates, start_year=2002, end_year=2025, 
+                       dtype=np.float32, sampling="mc"):
+        """Ouvre le stockage de root pour le reprendre s'il a les mêmes paramètres, ou le crée"""
+        if not os.path.exists(os.path.join(root, 'store.json')):
+            return cls.create(root, selection, n_replicates, start_year, end_year, dtype, sampling)
+        store = cls(root)
+        expected = {"communes": [list(key) for key in selection], 
+                    "annees": list(range(start_year, end_year + 1)), 
+                    "replicats": int(n_replicates), 
+                    "dtype": np.dtype(dtype).name, 
+                    "echantillonnage": sampling}
+        different = [field for field, value in expected.items() if store.meta.get(field) != value]
+        if different:
+            raise ValueError(f"Le stockage {root} a été créé avec d'autres paramètres "
+                             f"({', '.join(different)}): choisir un autre répertoire ou le supprimer")
+        return store
+    
+    def _save_meta(self):
+        path = os.path.join(self.root, 'store.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+    
+    def _path(self, pays, commune):
+        if (pays, commune) not in self._index:
+            raise KeyError(f"Commune absente du stockage: {commune} ({pays})")
+        return os.path.join(self.root, f'{self._index[(pays, commune)]:05d}.npy')
+    
+    def array(self, pays, commune, mode='r'):
+        """Tableau projeté (indicateurs × années × réplicats) d'une commune"""
+        path = self._path(pays, commune)
+        if mode == 'w+' or (mode == 'r+' and not os.path.exists(path)):
+            return np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, 
+                                             shape=(len(self.columns), len(self.years), self.n_replicates))
+        return np.load(path, mmap_mode=mode)
+    
+    def is_complete(self, pays, commune):
+        """Vrai si l'ensemble de la commune est entièrement écrit"""
+        return self._index[(pays, commune)] in self.meta["terminees"]
+    
+    def simulate(self, seed=None, chunk_size=TAILLE_BLOC_REPLICATS):
+        """Simule et écrit l'ensemble de chaque commune par morceaux, en sautant les communes terminées"""
+        seed = np.random.SeedSequence(self.meta["graine"] if seed is None else seed).entropy
+        if self.meta["graine"] not in (None, seed):
+            self.meta["terminees"] = []
+        self.meta["graine"] = seed
+        for pays, commune in self.meta["communes"]:
+            if self.is_complete(pays, commune):
+                continue
+            analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, seed=seed, start_year=int(self.years[0]), 
+                                                     end_year=int(self.years[-1]), 
+                                                     sampling=self.meta.get("echantillonnage", "mc"))
+            print(f"🎲 {self.n_replicates:,} réplicats pour {commune}, {pays} -> {self._path(pays, commune)}")
+            target = self.array(pays, commune, mode='w+')
+            for i, (first, _, paths) in enumerate(analyzer.iter_ensemble_chunks(self.n_replicates, chunk_size, 
+                                                                                self.dtype)):
+                # (réplicats × années × indicateurs) -> (indicateurs × années × réplicats)
+                target[:, :, first:first + len(paths)] = paths.transpose(2, 1, 0)
+                if i % 64 == 63:
+                    # Borne les pages modifiées en attente d'écriture
+                    target.flush()
+            target.flush()
+            del target
+            self.meta["terminees"].append(self._index[(pays, commune)])
+            self._save_meta()
+        return self
+    
+    def slice(self, pays, commune, indicator, replicates=slice(None)):
+        """Trajectoires d'un indicateur (années × réplicats) sans charger le reste du tableau"""
+        return np.asarray(self.array(pays, commune)[self.columns.index(indicator), :, replicates])
+    
+    def percentiles(self, pays, commune, q=(5, 50, 95), indicators=None, max_bytes=256 * 1024 ** 2):
+        """Percentiles par année des indicateurs d'une commune, lus par blocs d'au plus max_bytes"""
+        indicators = indicators or self.columns
+        data = self.array(pays, commune)
+        years_per_block = max(1, max_bytes // (self.n_replicates * self.dtype.itemsize))
+        values = np.empty((len(q), len(self.years), len(indicators)))
+        for k, indicator in enumerate(indicators):
+            row = self.columns.index(indicator)
+            for lo in range(0, len(self.years), years_per_block):
+                block = np.asarray(data[row, lo:lo + years_per_block], dtype=np.float64)
+                values[:, lo:lo + years_per_block, k] = np.percentile(block, q, axis=1)
+        result = {}
+        for i, level in enumerate(q):
+            frame = pd.DataFrame(values[i], columns=list(indicators))
+            frame.insert(0, 'Annee', self.years)
+            result[level] = frame
+        return result
+    
+    def summarize(self, pays, commune, max_bytes=256 * 1024 ** 2):
+        """Bandes de l'ensemble d'une commune, au format de summarize_ensemble"""
+        bands = self.percentiles(pays, commune, (5, 50, 95), max_bytes=max_bytes)
+        data = self.array(pays, commune)
+        means = np.empty((len(self.years), len(self.columns)))
+        years_per_block = max(1, max_bytes // (self.n_replicates * self.dtype.itemsize))
+        for k in range(len(self.columns)):
+            for lo in range(0, len(self.years), years_per_block):
+                means[lo:lo + years_per_block, k] = data[k, lo:lo + years_per_block].mean(axis=1, dtype=np.float64)
+        mean = pd.DataFrame(means, columns=self.columns)
+        mean.insert(0, 'Annee', self.years)
+        return {"moyenne": mean, "mediane": bands[50], "p5": bands[5], "p95": bands[95]}
+
+
+def _pyplot():
+    """Importe matplotlib.pyplot à la demande: les exécutions sans figure ne le chargent jamais"""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def use_headless_backend():
+    """Force le backend graphique non interactif (aucune fenêtre, aucun blocage)"""
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    if pyplot is not None and pyplot.get_backend().lower() == 'agg':
+        return
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _init_batch_worker(render=True):
+    """Initialise un processus de traitement par lots (backend graphique non interactif)"""
+    if render:
+        use_headless_backend()
+
+
+def _save_data(analyzer, df, data_options=None):
+    """Écrit les données annuelles d'une commune selon les options (résolution, devises, format)"""
+    options = dict(data_options or {})
+    currencies = options.pop("currencies", ())
+    data = analyzer.to_resolution(df, options.get("resolution", "annuel"))
+    if currencies:
+        data = analyzer.with_currencies(data, currencies)
+    return analyzer.save_financial_data(data, **options)
+
+
+def _process_commune(pays, commune, output_dir, seed=None, profile="print", fmt="png", 
+                     data_options=None, panel_dir=None, render=True, cache_dir=None, 
+                     cache_max_bytes=1024 ** 3, forecast_horizon=0, forecast_method="ets", 
+                     instrument=None, profile_stage=None):
+    """Traite une commune de bout en bout: données, insights, prévisions et figure"""
+    start = time.perf_counter()
+    result = {"pays": pays, "commune": commune}
+    instrumentation = SANS_INSTRUMENTATION
+    if instrument or profile_stage:
+        instrumentation = Instrumentation(enabled=bool(instrument), memory=instrument == "memoire", 
+                                          profile_stage=profile_stage, 
+                                          profile_dir=os.path.join(output_dir, 'profils'), 
+                                          label=f'{commune}_{pays}')
+    try:
+        cache = ResultCache(cache_dir, cache_max_bytes) if cache_dir else None
+        analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, output_dir=output_dir, seed=seed, 
+                                                 cache=cache, instrumentation=instrumentation)
+        financial_data = analyzer.generate_financial_data()
+        data_file = _save_data(analyzer, financial_data, data_options)
+        if panel_dir:
+            with instrumentation.stage("panel"):
+                PanelWriter(panel_dir).append(pays, commune, financial_data)
+        insights_file = os.path.join(output_dir, f'{commune}_{pays}_insights.json')
+        with open(insights_file, 'w', encoding='utf-8') as f:
+            json.dump(analyzer.compute_financial_insights(financial_data), f, ensure_ascii=False, indent=2)
+        result.update(statut="ok", donnees=data_file, insights=insights_file)
+        if forecast_horizon:
+            forecast_file = os.path.join(output_dir, f'{commune}_{pays}_forecast.csv')
+            analyzer.forecast(financial_data, forecast_horizon, forecast_method).to_csv(forecast_file, index=False)
+            result["previsions"] = forecast_file
+        if render:
+            analyzer.create_financial_analysis(financial_data, profile=profile, fmt=fmt, headless=True, 
+                                               insights=False)
+            result["figure"] = analyzer.figure_path(fmt)
+    except Exception as exc:
+        result.update(statut="erreur", erreur=f"{type(exc).__name__}: {exc}")
+    result["duree_s"] = round(time.perf_counter() - start, 3)
+    if instrumentation is not SANS_INSTRUMENTATION:
+        result["instrumentation"] = instrumentation.report()
+    return result
+
+
+def _render_commune(pays, commune, df, output_dir, profile, fmt, ensemble=None):
+    """Rend la figure d'une commune à partir de données déjà générées"""
+    start = time.perf_counter()
+    analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, output_dir=output_dir)
+    analyzer.create_financial_analysis(df, ensemble=ensemble, profile=profile, fmt=fmt, 
+                                       headless=True, insights=False)
+    return {"pays": pays, "commune": commune, "figure": analyzer.figure_path(fmt), 
+            "duree_s": round(time.perf_counter() - start, 3)}
+
+
+def render_figures(frames, workers=None, output_dir='.', profile="screen", fmt="png", ensembles=None):
+    """Rend les figures de plusieurs communes dans un pool de processus, dans l'ordre de frames"""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    ensembles = ensembles or {}
+    jobs = [(pays, commune, df, output_dir, profile, fmt, ensembles.get((pays, commune))) 
+            for (pays, commune), df in frames.items()]
+    if workers == 1:
+        use_headless_backend()
+        return [_render_commune(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+        return list(executor.map(_render_commune, *zip(*jobs)))
+
+
+def run_batch(selection, workers=None, output_dir='.', seed=None, profile="print", fmt="png", 
+              data_options=None, panel_dir=None, render=True, cache_dir=None, 
+              cache_max_bytes=1024 ** 3, forecast_horizon=0, forecast_method="ets", 
+              instrument=None, profile_stage=None):
+    """Traite un lot de communes dans un pool de processus et écrit run_summary.json"""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if cache_dir and seed is None:
+        # Sans graine fixe, chaque exécution tire de nouvelles données: rien à réutiliser
+        print("⚠️ --cache-dir ignoré sans graine fixe (--seed)")
+        cache_dir = None
+    seed = np.random.SeedSequence(seed).entropy
+    started = datetime.now()
+    start = time.perf_counter()
+    
+    print(f"🚀 Traitement de {len(selection)} communes avec {workers} processus...")
+    options = dict(seed=seed, profile=profile, fmt=fmt, data_options=data_options, 
+                   panel_dir=panel_dir, render=render, cache_dir=cache_dir, 
+                   cache_max_bytes=cache_max_bytes, forecast_horizon=forecast_horizon, 
+                   forecast_method=forecast_method, instrument=instrument, profile_stage=profile_stage)
+    results = []
+    if workers == 1:
+        _init_batch_worker(render)
+        for pays, commune in selection:
+            results.append(_process_commune(pays, commune, output_dir, **options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, 
+                                 initargs=(render,)) as executor:
+            futures = [executor.submit(_process_commune, pays, commune, output_dir, **options) 
+                       for pays, commune in selection]
+            for future in as_completed(futures):
+                results.append(future.result())
+    
+    # Ordre de la sélection dans le résumé
+    order = {key: i for i, key in enumerate(selection)}
+    results.sort(key=lambda r: order[(r["pays"], r["commune"])])
+    
+    summary = {
+        "debut": started.isoformat(timespec='seconds'),
+        "duree_s": round(time.perf_counter() - start, 3),
+        "processus": workers,
+        "graine": seed,
+        "communes": len(results),
+        "succes": sum(r["statut"] == "ok" for r in results),
+        "echecs": sum(r["statut"] != "ok" for r in results),
+        "resultats": results,
+    }
+    summary_file = os.path.join(output_dir, 'run_summary.json')
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    if instrument or profile_stage:
+        _write_run_report(output_dir, summary, results)
+    
+    print(f"\n✅ Lot terminé: {summary['succes']}/{summary['communes']} communes en {summary['duree_s']:.1f}s")
+    for r in results:
+        if r["statut"] != "ok":
+            print(f"❌ {r['commune']}, {r['pays']}: {r['erreur']}")
+    print(f"📋 Résumé: {summary_file}")
+    return summary
+
+
+def _generate_commune(pays, commune, seed):
+    """Génère les données d'une commune dans un processus (étage de génération du pipeline)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = AfriqueCommuneFinanceAnalyzer(commune, pays, seed=seed).generate_financial_data()
+    return df, time.perf_counter() - start
+
+
+def run_pipeline(selection, workers=None, output_dir='.', seed=None, profile="print", fmt="png", 
+                 data_options=None, panel_dir=None, render=True, queue_size=4):
+    """Traite un lot en pipeline (génération et rendu dans le pool, écriture dans un thread) et écrit run_summary.json"""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    seed = np.random.SeedSequence(seed).entropy
+    started = datetime.now()
+    start = time.perf_counter()
+    generated = queue.Queue(queue_size)
+    to_render = queue.Queue(queue_size)
+    results = {}
+    busy = {"generation": 0.0, "ecriture": 0.0, "rendu": 0.0}
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(render,))
+    
+    def generate():
+        # Soumet les générations au pool: au plus queue_size en attente d'écriture
+        try:
+            for pays, commune in selection:
+                results[(pays, commune)] = {"pays": pays, "commune": commune, "etapes": {}}
+                generated.put(((pays, commune), executor.submit(_generate_commune, pays, commune, seed)))
+        finally:
+            generated.put(None)
+    
+    def write():
+        try:
+            while (item := generated.get()) is not None:
+                (pays, commune), future = item
+                result = results[(pays, commune)]
+                try:
+                    df, duration = future.result()
+                except Exception as exc:
+                    result.update(statut="erreur", erreur=f"{type(exc).__name__}: {exc}")
+                    continue
+                result["etapes"]["generation"] = round(duration, 3)
+                busy["generation"] += duration
+                stage_start = time.perf_counter()
+                try:
+                    analyzer = AfriqueCommuneFinanceAnalyzer(commune, pays, output_dir=output_dir, seed=seed)
+                    data_file = _save_data(analyzer, df, data_options)
+                    if panel_dir:
+                        PanelWriter(panel_dir).append(pays, commune, df)
+                    insights_file = os.path.join(output_dir, f'{commune}_{pays}_insights.json')
+                    with open(insights_file, 'w', encoding='utf-8') as f:
+                        json.dump(analyzer.compute_financial_insights(df), f, ensure_ascii=False, indent=2)
+                    result.update(statut="ok", donnees=data_file, insights=insights_file)
+                except Exception as exc:
+                    result.update(statut="erreur", erreur=f"{type(exc).__name__}: {exc}")
+                result["etapes"]["ecriture"] = round(time.perf_counter() - stage_start, 3)
+                busy["ecriture"] += time.perf_counter() - stage_start
+                if render and result["statut"] == "ok":
+                    to_render.put(((pays, commune), executor.submit(
+                        _render_commune, pays, commune, df, output_dir, profile, fmt)))
+        finally:
+            to_render.put(None)
+    
+    print(f"🚀 Pipeline de {len(selection)} communes sur {workers} processus...")
+    threads = [threading.Thread(target=generate, name="generation", daemon=True), 
+               threading.Thread(target=write, name="ecriture", daemon=True)]
+    try:
+        for thread in threads:
+            thread.start()
+        # Étage de rendu (thread principal): collecte les figures dans l'ordre de soumission
+        while (item := to_render.get()) is not None:
+            key, future = item
+            try:
+                rendered = future.result()
+            except Exception as exc:
+                results[key].update(statut="erreur", erreur=f"{type(exc).__name__}: {exc}")
+                continue
+            results[key]["figure"] = rendered["figure"]
+            results[key]["etapes"]["rendu"] = rendered["duree_s"]
+            busy["rendu"] += rendered["duree_s"]
+        for thread in threads:
+            thread.join()
+    finally:
+        executor.shutdown(cancel_futures=True)
+    
+    ordered = [results[key] for key in selection if key in results]
+    duration = time.perf_counter() - start
+    summary = {
+        "debut": started.isoformat(timespec='seconds'),
+        "duree_s": round(duration, 3),
+        "mode": "pipeline",
+        "processus": workers,
+        "graine": seed,
+        "communes": len(ordered),
+        "succes": sum(r.get("statut") == "ok" for r in ordered),
+        "echecs": sum(r.get("statut") != "ok" for r in ordered),
+        # Temps cumulé de chaque étage: le plus chargé borne la durée totale
+        "occupation_etapes_s": {stage: round(seconds, 3) for stage, seconds in busy.items()},
+        "resultats": ordered,
     }
+    summary_file = os.path.join(output_dir, 'run_summary.json')
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n✅ Pipeline terminé: {summary['succes']}/{summary['communes']} communes en {duration:.1f}s")
+    print("⏱️ Occupation des étages: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in busy.items()))
+    for r in ordered:
+        if r.get("statut") != "ok":
+            print(f"❌ {r['commune']}, {r['pays']}: {r['erreur']}")
+    print(f"📋 Résumé: {summary_file}")
+    return summary
+
+
+def _write_run_report(output_dir, summary, results):
+    """Écrit run_report.json: mesures par étape, agrégées et par commune"""
+    report = {
+        "debut": summary["debut"],
+        "duree_s": summary["duree_s"],
+        "processus": summary["processus"],
+        "etapes": stage_summary(results),
+        "communes": [{"pays": r["pays"], "commune": r["commune"], "duree_s": r["duree_s"], 
+                      **r.get("instrumentation", {})} for r in results],
+    }
+    report_file = os.path.join(output_dir, 'run_report.json')
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"⏱️ Rapport d'exécution: {report_file}")
+    for entry in report["etapes"][:5]:
+        print(f"   {entry['etape']:<12} {entry['duree_s']:8.3f}s  (CPU {entry['cpu_s']:.3f}s, "
+              f"max {entry['duree_max_s']:.3f}s)")
+    return report_file
+
+
+class LRUCache:
+    """Cache mémoire borné en nombre d'entrées et en octets, éviction du moins récemment utilisé"""
+    
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        """Valeur associée à key (et la marque comme récente), ou None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def put(self, key, value):
+        """Ajoute une valeur (bytes), puis évince jusqu'à respecter les bornes"""
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[1])
+        self._entries[key] = value
+        self._bytes += len(value[1])
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted[1])
+    
+    def stats(self):
+        """Occupation et taux de succès du cache"""
+        return {"entrees": len(self._entries), "octets": self._bytes, 
+                "succes": self.hits, "echecs": self.misses}
+
+
+def _service_analyzer(pays, commune, seed, output_dir='.'):
+    """Analyseur d'une commune connue du registre (KeyError sinon)"""
+    get_registry().commune_config(commune, pays, strict=True)
+    return AfriqueCommuneFinanceAnalyzer(commune, pays, output_dir=output_dir, seed=seed)
+
+
+def _service_series(pays, commune, seed, resolution="annuel", currencies=()):
+    """Séries générées d'une commune, en JSON (orientation « split »)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = _service_analyzer(pays, commune, seed)
+        df = analyzer.generate_financial_data(resolution=resolution)
+    if currencies:
+        df = analyzer.with_currencies(df, currencies)
+    return df.to_json(orient='split', index=False, date_format='iso').encode('utf-8')
+
+
+def _service_insights(pays, commune, seed):
+    """Insights d'une commune, en JSON"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = _service_analyzer(pays, commune, seed)
+        insights = analyzer.compute_financial_insights(analyzer.generate_financial_data())
+    return json.dumps(insights, ensure_ascii=False).encode('utf-8')
+
+
+def _service_figure(pays, commune, seed, profile="screen", fmt="png"):
+    """Figure d'analyse d'une commune (contenu du fichier)"""
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        analyzer = _service_analyzer(pays, commune, seed, output_dir=tmp)
+        analyzer.create_financial_analysis(analyzer.generate_financial_data(), profile=profile, fmt=fmt, 
+                                           headless=True, insights=False)
+        with open(analyzer.figure_path(fmt), 'rb') as f:
+            return f.read()
+
+
+# Types de contenu des figures servies
+_TYPES_FIGURE = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+
+class EcoService:
+    """Service HTTP/JSON local (asyncio) exposant les simulations des communes, avec cache LRU des réponses"""
+    
+    ROUTES = {"series": _service_series, "insights": _service_insights, "figure": _service_figure}
+    
+    def __init__(self, workers=None, max_entries=256, max_bytes=256 * 1024 ** 2):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = LRUCache(max_entries, max_bytes)
+        self._pending = {}
+        self._executor = None
+    
+    def _request_args(self, route, query):
+        """Arguments de la fonction de calcul d'une route, validés"""
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        if "pays" not in params or "commune" not in params:
+            raise ValueError("paramètres pays et commune requis")
+        args = [params["pays"], params["commune"], int(params.get("seed", 0))]
+        if route == "series":
+            resolution = params.get("resolution", "annuel")
+            if resolution not in RESOLUTIONS:
+                raise ValueError(f"Résolution inconnue: {resolution}")
+            currencies = tuple(c for c in params.get("currencies", "").split(',') if c)
+            fx = get_registry().fx
+            inconnues = [c for c in currencies if c not in fx.fixed_rates and c not in fx.series]
+            if inconnues:
+                raise ValueError(f"Devise(s) inconnue(s): {', '.join(inconnues)}")
+            args += [resolution, currencies]
+        elif route == "figure":
+            profile, fmt = params.get("profile", "screen"), params.get("fmt", "png")
+            if profile not in PROFILS_RENDU or fmt not in FORMATS_FIGURE:
+                raise ValueError(f"Profil ou format inconnu: {profile}, {fmt}")
+            args += [profile, fmt]
+        return tuple(args)
+    
+    async def compute(self, route, args):
+        """Réponse (type de contenu, corps) d'une route, depuis le cache ou le pool de processus"""
+        key = (route,) + args
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._run(route, args))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(pending)
+    
+    async def _run(self, route, args):
+        body = await asyncio.get_running_loop().run_in_executor(self._executor, self.ROUTES[route], *args)
+        content_type = "application/json" if route != "figure" else _TYPES_FIGURE[args[-1]]
+        self.cache.put((route,) + args, (content_type, body))
+        return content_type, body
+    
+    async def handle(self, reader, writer):
+        """Traite une connexion HTTP/1.1 (une requête, puis fermeture)"""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            status, content_type, body = await self._respond(request_line.decode('latin-1'))
+            writer.write((f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                          f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode('latin-1') + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _respond(self, request_line):
+        """Statut, type de contenu et corps de la réponse à une ligne de requête"""
+        def error(status, message):
+            return status, "application/json", json.dumps({"erreur": message}, ensure_ascii=False).encode('utf-8')
+        
+        parts = request_line.split()
+        if len(parts) != 3 or parts[0] != "GET":
+            return error("405 Method Not Allowed", "seule la méthode GET est acceptée")
+        url = urlsplit(parts[1])
+        route = unquote(url.path).strip('/')
+        if route == "communes":
+            return "200 OK", "application/json", json.dumps(
+                get_registry().communes_par_pays(), ensure_ascii=False).encode('utf-8')
+        if route == "sante":
+            return "200 OK", "application/json", json.dumps(
+                {"processus": self.workers, "cache": self.cache.stats(), "en_cours": len(self._pending)}).encode('utf-8')
+        if route not in self.ROUTES:
+            return error("404 Not Found", f"route inconnue: /{route}")
+        try:
+            content_type, body = await self.compute(route, self._request_args(route, url.query))
+        except KeyError as exc:
+            return error("404 Not Found", str(exc.args[0]) if exc.args else str(exc))
+        except ValueError as exc:
+            return error("400 Bad Request", str(exc))
+        except Exception as exc:
+            return error("500 Internal Server Error", f"{type(exc).__name__}: {exc}")
+        return "200 OK", content_type, body
+    
+    async def serve(self, host="127.0.0.1", port=8765):
+        """Démarre le pool de processus et sert jusqu'à interruption"""
+        # Pas de fork après start_server: les processus hériteraient des sockets clients
+        context = multiprocessing.get_context("forkserver" if sys.platform != "win32" else "spawn")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_batch_worker, 
+                                             mp_context=context)
+        try:
+            server = await asyncio.start_server(self.handle, host, port)
+            print(f"🌍 Service Eco sur http://{host}:{port} ({self.workers} processus)")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+
+def _parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Analyse des comptes communaux en Afrique (2002-2025)")
+    parser.add_argument('--batch', action='store_true', 
+                        help="mode non interactif: traite toutes les communes sélectionnées")
+    parser.add_argument('--serve', action='store_true', 
+                        help="lance le service HTTP/JSON local (voir EcoService)")
+    parser.add_argument('--host', default="127.0.0.1", help="adresse d'écoute du service")
+    parser.add_argument('--port', type=int, default=8765, help="port du service (8765 par défaut)")
+    parser.add_argument('--cache-entries', type=int, default=256, 
+                        help="nombre maximal de réponses gardées en mémoire par le service")
+    parser.add_argument('--pays', nargs='+', default=["all"], 
+                        help='pays à traiter ("all" par défaut)')
+    parser.add_argument('--communes', nargs='+', default=["all"], 
+                        help='communes à traiter ("all" par défaut)')
+    parser.add_argument('--pipeline', action='store_true', 
+                        help="batch en pipeline: génération, écriture et rendu se recouvrent")
+    parser.add_argument('--queue-size', type=int, default=4, 
+                        help="communes en attente au plus entre deux étages du pipeline")
+    parser.add_argument('--workers', type=int, default=None, 
+                        help="nombre de processus (nombre de cœurs par défaut)")
+    parser.add_argument('--output-dir', default='.', help="répertoire de sortie")
+    parser.add_argument('--seed', type=int, default=None, 
+                        help="graine aléatoire (résultats reproductibles)")
+    parser.add_argument('--profile', choices=list(PROFILS_RENDU), default="print", 
+                        help="profil de rendu des figures (taille/résolution)")
+    parser.add_argument('--format', dest='fmt', choices=list(FORMATS_FIGURE), default="png", 
+                        help="format des figures")
+    parser.add_argument('--headless', action='store_true', 
+                        help="n'affiche pas la figure (backend non interactif)")
+    parser.add_argument('--data-format', choices=list(FORMATS_DONNEES), default="csv", 
+                        help="format des données (csv par défaut, parquet/feather nécessitent pyarrow)")
+    parser.add_argument('--float32', action='store_true', 
+                        help="écrit les montants en simple précision")
+    parser.add_argument('--compression', default=None, 
+                        help="compression des données (csv: gzip, bz2, xz, zstd, zip; "
+                             "parquet: snappy, gzip, brotli, lz4, zstd; feather: lz4, zstd)")
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default="annuel", 
+                        help="pas de temps des données écrites (annuel par défaut)")
+    parser.add_argument('--currencies', nargs='+', default=[], metavar='DEVISE', 
+                        help="ajoute les montants convertis aux taux historiques (ex. EUR USD)")
+    parser.add_argument('--data-only', action='store_true', 
+                        help="données seules: aucune figure, aucune bibliothèque graphique chargée")
+    parser.add_argument('--cache-dir', default=None, 
+                        help="cache disque des données et figures (avec --seed)")
+    parser.add_argument('--cache-max-mb', type=int, default=1024, 
+                        help="taille maximale du cache en Mo (1024 par défaut)")
+    parser.add_argument('--panel-dir', default=None, 
+                        help="ajoute chaque commune au panel Parquet partitionné par pays")
+    parser.add_argument('--instrument', nargs='?', choices=["temps", "memoire"], const="memoire", default=None, 
+                        help="mesure durée, temps CPU et pic mémoire (ou seulement les temps) "
+                             "de chaque étape (run_report.json)")
+    parser.add_argument('--profile-stage', choices=list(ETAPES_INSTRUMENTEES), default=None, 
+                        help="profile une étape avec cProfile (fichiers dans profils/)")
+    parser.add_argument('--ensemble-store', default=None, metavar='REPERTOIRE', 
+                        help="simule les ensembles Monte Carlo des communes sur disque (np.memmap)")
+    parser.add_argument('--replicates', type=int, default=10000, 
+                        help="nombre de réplicats par commune avec --ensemble-store (10000 par défaut)")
+    parser.add_argument('--sampling', choices=list(METHODES_ECHANTILLONNAGE), default="mc", 
+                        help="tirage des ensembles: mc, antithetique, lhs ou sobol (ces deux derniers avec scipy)")
+    parser.add_argument('--forecast', type=int, default=0, metavar='ANNEES', 
+                        help="prévoit les indicateurs sur ANNEES années après 2025 (nécessite statsmodels)")
+    parser.add_argument('--forecast-method', choices=list(METHODES_PREVISION), default="ets", 
+                        help="modèle de prévision (ets par défaut)")
+    args = parser.parse_args(argv)
+    if args.pipeline and (args.cache_dir or args.forecast or args.instrument or args.profile_stage):
+        parser.error("--cache-dir, --forecast, --instrument et --profile-stage ne sont pas disponibles avec --pipeline")
+    try:
+        _check_compression(args.data_format, args.compression)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
+
+
+def _data_options(args):
+    """Options d'écriture des données issues de la ligne de commande"""
+    return {"fmt": args.data_format, "float32": args.float32, "compression": args.compression, 
+            "resolution": args.resolution, "currencies": args.currencies}
+
+
+def main(argv=None):
+    """Fonction principale pour l'Afrique"""
+    args = _parse_args(argv)
+    if args.serve:
+        service = EcoService(workers=args.workers, max_entries=args.cache_entries)
+        try:
+            asyncio.run(service.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            print("\n👋 Service arrêté")
+        return
+    if args.batch:
+        pays = "all" if args.pays == ["all"] else args.pays
+        communes = "all" if args.communes == ["all"] else args.communes
+        if args.ensemble_store:
+            EnsembleStore.open_or_create(args.ensemble_store, select_communes(pays, communes), 
+                                         args.replicates, sampling=args.sampling).simulate(seed=args.seed)
+            print(f"✅ Ensembles écrits dans {args.ensemble_store}")
+            return
+        if args.pipeline:
+            run_pipeline(select_communes(pays, communes), workers=args.workers, 
+                         output_dir=args.output_dir, seed=args.seed, profile=args.profile, fmt=args.fmt, 
+                         data_options=_data_options(args), panel_dir=args.panel_dir, 
+                         render=not args.data_only, queue_size=args.queue_size)
+            return
+        run_batch(select_communes(pays, communes), workers=args.workers, 
+                  output_dir=args.output_dir, seed=args.seed, profile=args.profile, fmt=args.fmt, 
+                  data_options=_data_options(args), panel_dir=args.panel_dir, 
+                  render=not args.data_only, cache_dir=args.cache_dir, 
+                  cache_max_bytes=args.cache_max_mb * 1024 ** 2, 
+                  forecast_horizon=args.forecast, forecast_method=args.forecast_method, 
+                  instrument=args.instrument, profile_stage=args.profile_stage)
+        return
+    
+    communes_par_pays = get_registry().communes_par_pays()
     
     print("🏛️ ANALYSE DES COMPTES COMMUNAUX EN AFRIQUE (2002-2025)")
     print("=" * 60)
@@ -1074,14 +2718,23 @@ def main():
         commune_selectionnee = communes[0]
     
     # Initialiser l'analyseur
-    analyzer = AfriqueCommuneFinanceAnalyzer(commune_selectionnee, pays_selectionne)
+    instrumentation = None
+    if args.instrument or args.profile_stage:
+        instrumentation = Instrumentation(enabled=bool(args.instrument), memory=args.instrument == "memoire", 
+                                          profile_stage=args.profile_stage, 
+                                          profile_dir=os.path.join(args.output_dir, 'profils'), 
+                                          label=f'{commune_selectionnee}_{pays_selectionne}')
+    started = datetime.now()
+    start = time.perf_counter()
+    analyzer = AfriqueCommuneFinanceAnalyzer(commune_selectionnee, pays_selectionne, 
+                                         output_dir=args.output_dir, seed=args.seed, 
+                                         instrumentation=instrumentation)
     
     # Générer les données
     financial_data = analyzer.generate_financial_data()
     
     # Sauvegarder les données
-    output_file = f'{commune_selectionnee}_{pays_selectionne}_financial_data_2002_2025.csv'
-    financial_data.to_csv(output_file, index=False)
+    output_file = _save_data(analyzer, financial_data, _data_options(args))
     print(f"💾 Données sauvegardées: {output_file}")
     
     # Aperçu des données
@@ -1089,13 +2742,25 @@ def main():
     print(financial_data[['Annee', 'Population', 'Recettes_Totales', 'Depenses_Totales', 'Dette_Totale']].head())
     
     # Créer l'analyse
-    print("\n📈 Création de l'analyse financière...")
-    analyzer.create_financial_analysis(financial_data)
+    if args.data_only:
+        print()
+        analyzer._generate_financial_insights(financial_data)
+    else:
+        print("\n📈 Création de l'analyse financière...")
+        analyzer.create_financial_analysis(financial_data, profile=args.profile, fmt=args.fmt, 
+                                           headless=args.headless)
     
     print(f"\n✅ Analyse des comptes communaux de {commune_selectionnee}, {pays_selectionne} terminée!")
     print(f"📊 Période: {analyzer.start_year}-{analyzer.end_year}")
     print(f"💰 Devise: {analyzer.devise} ({analyzer.symbole})")
     print("📦 Données: Démographie, finances, investissements, dette")
+    
+    if instrumentation is not None:
+        duration = round(time.perf_counter() - start, 3)
+        summary = {"debut": started.isoformat(timespec='seconds'), "duree_s": duration, "processus": 1}
+        _write_run_report(args.output_dir, summary, [{"pays": pays_selectionne, "commune": commune_selectionnee, 
+                                                      "duree_s": duration, 
+                                                      "instrumentation": instrumentation.report()}])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
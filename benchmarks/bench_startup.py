@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Mesure le temps de démarrage d'un processus « données seules » d'Eco.py
+
+Compare, dans des processus neufs, l'import d'Eco suivi de la génération
+d'une commune (chemin données seules, sans bibliothèque graphique) avec le
+même travail précédé du chargement de matplotlib.pyplot et seaborn, coût
+que payait chaque processus quand ces imports étaient en tête de module.
+
+    python3 benchmarks/bench_startup.py --repeat 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "donnees_seules": (
+        "import Eco\n"
+        "Eco.AfriqueCommuneFinanceAnalyzer('Dakar', 'Sénégal', seed=0).generate_financial_data()\n"
+    ),
+    "avec_graphiques": (
+        "import matplotlib.pyplot, seaborn\n"
+        "import Eco\n"
+        "Eco.AfriqueCommuneFinanceAnalyzer('Dakar', 'Sénégal', seed=0).generate_financial_data()\n"
+    ),
+}
+
+
+def mesurer(code, repeat):
+    """Durées (s) de repeat exécutions de code dans un interpréteur neuf"""
+    durees = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=RACINE, check=True, 
+                       stdout=subprocess.DEVNULL)
+        durees.append(time.perf_counter() - start)
+    return durees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="nombre de processus par scénario")
+    args = parser.parse_args()
+    
+    medianes = {}
+    for nom, code in SCENARIOS.items():
+        durees = mesurer(code, args.repeat)
+        medianes[nom] = statistics.median(durees)
+        print(f"{nom:<16} médiane {medianes[nom]:.3f}s  (min {min(durees):.3f}s, max {max(durees):.3f}s)")
+    
+    gain = medianes["avec_graphiques"] - medianes["donnees_seules"]
+    print(f"Gain par processus: {gain:.3f}s ({gain / medianes['avec_graphiques'] * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
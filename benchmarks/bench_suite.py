@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Suite de benchmarks d'Eco.py: génération, tendances, écritures, rendu et insights
+
+Chronomètre séparément chaque étape du traitement d'une commune, pour
+plusieurs nombres de communes, de réplicats Monte Carlo et de résolutions
+temporelles. Chaque exécution est ajoutée (une ligne JSON) à l'historique
+benchmarks/historique.jsonl et comparée à la précédente exécution: une
+médiane plus lente de plus de --seuil est signalée comme régression.
+
+    python3 benchmarks/bench_suite.py --communes 1 5 --replicats 1000 10000 \\
+        --resolutions annuel mensuel --repeat 3
+    python3 benchmarks/bench_suite.py --sans-rendu --verifier   # code retour 1 si régression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import Eco  # noqa: E402
+
+HISTORIQUE_DEFAUT = os.path.join(RACINE, 'benchmarks', 'historique.jsonl')
+
+
+def chronometrer(fonction, repeat, preparer=None):
+    """Durées (s) de repeat appels de fonction(preparer()), sorties console masquées"""
+    durees = []
+    for _ in range(repeat):
+        argument = preparer() if preparer else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fonction(argument)
+            durees.append(time.perf_counter() - start)
+    return durees
+
+
+def mesure(etape, durees, **parametres):
+    """Enregistrement d'une mesure pour l'historique"""
+    return {"etape": etape, **parametres, "mediane_s": round(statistics.median(durees), 6),
+            "min_s": round(min(durees), 6), "repetitions": len(durees)}
+
+
+def bench_communes(n_communes, resolution, repeat, formats, rendu, profile, tmp):
+    """Mesure les étapes du traitement de n_communes communes à une résolution"""
+    selection = Eco.select_communes()[:n_communes]
+    analyzers = [Eco.AfriqueCommuneFinanceAnalyzer(commune, pays, output_dir=tmp, seed=0)
+                 for pays, commune in selection]
+    with contextlib.redirect_stdout(io.StringIO()):
+        annuel = [a.generate_financial_data() for a in analyzers]
+        donnees = [a.to_resolution(df, resolution) for a, df in zip(analyzers, annuel)]
+    parametres = {"communes": len(selection), "resolution": resolution}
+
+    resultats = [mesure("generation", chronometrer(
+        lambda _: [a.generate_financial_data(resolution=resolution) for a in analyzers], repeat),
+        **parametres)]
+
+    if resolution == "annuel":
+        # Les tendances s'appliquent aux données annuelles: mesurées une fois, à cette résolution.
+        # Elles modifient le DataFrame: une copie neuve par répétition, hors chronomètre
+        resultats.append(mesure("tendances", chronometrer(
+            lambda copies: [a._add_african_trends(df) for a, df in zip(analyzers, copies)], repeat,
+            preparer=lambda: [df.copy() for df in annuel]), **parametres))
+
+    for fmt in formats:
+        resultats.append(mesure(f"ecriture_{fmt}", chronometrer(
+            lambda _: [a.save_financial_data(df, fmt=fmt, resolution=resolution)
+                       for a, df in zip(analyzers, donnees)], repeat), **parametres))
+
+    if resolution == "annuel":
+        resultats.append(mesure("insights", chronometrer(
+            lambda _: [a.compute_financial_insights(df) for a, df in zip(analyzers, annuel)], repeat),
+            **parametres))
+        if rendu:
+            resultats.append(mesure("rendu", chronometrer(
+                lambda _: [a.create_financial_analysis(df, profile=profile, headless=True, insights=False)
+                           for a, df in zip(analyzers, annuel)], repeat), **parametres, profil=profile))
+    return resultats
+
+
+def bench_ensemble(n_replicats, repeat):
+    """Mesure la simulation d'un ensemble Monte Carlo de n_replicats pour une commune"""
+    analyzer = Eco.AfriqueCommuneFinanceAnalyzer('Dakar', 'Sénégal', seed=0)
+    return [mesure("ensemble", chronometrer(lambda _: analyzer.simulate_ensemble(n_replicats), repeat),
+                   communes=1, replicats=n_replicats)]
+
+
+def identifiant(resultat):
+    """Clé d'une mesure: étape et paramètres, sans les durées"""
+    return tuple(sorted((k, str(v)) for k, v in resultat.items()
+                        if k not in ("mediane_s", "min_s", "repetitions")))
+
+
+def charger_historique(path):
+    """Exécutions précédentes, de la plus ancienne à la plus récente"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def comparer(resultats, precedente, seuil):
+    """Compare les médianes à celles de l'exécution précédente; retourne les régressions"""
+    reference = {identifiant(r): r for r in precedente["resultats"]} if precedente else {}
+    regressions = []
+    print(f"{'étape':<18}{'communes':>9}{'résolution':>13}{'réplicats':>10}{'médiane':>11}{'précédente':>12}{'écart':>9}")
+    for r in resultats:
+        avant = reference.get(identifiant(r))
+        ecart = r["mediane_s"] / avant["mediane_s"] - 1 if avant and avant["mediane_s"] > 0 else None
+        marque = ""
+        if ecart is not None and ecart > seuil:
+            regressions.append(r)
+            marque = " ⚠️"
+        print(f"{r['etape']:<18}{r.get('communes', ''):>9}{r.get('resolution', ''):>13}{r.get('replicats', ''):>10}"
+              f"{r['mediane_s']:>10.4f}s"
+              f"{(format(avant['mediane_s'], '.4f') + 's') if avant else '-':>12}"
+              f"{(format(ecart * 100, '+.0f') + '%') if ecart is not None else '-':>9}{marque}")
+    return regressions
+
+
+def commit_courant():
+    """Commit git de l'arbre mesuré, si disponible"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--communes', type=int, nargs='+', default=[1, 5],
+                        help="nombres de communes à traiter")
+    parser.add_argument('--replicats', type=int, nargs='+', default=[1000, 10000],
+                        help="tailles des ensembles Monte Carlo")
+    parser.add_argument('--resolutions', nargs='+', choices=list(Eco.RESOLUTIONS), default=["annuel", "mensuel"],
+                        help="résolutions temporelles des données")
+    parser.add_argument('--formats', nargs='+', choices=list(Eco.FORMATS_DONNEES), default=["csv", "parquet"],
+                        help="formats d'écriture mesurés")
+    parser.add_argument('--profile', choices=list(Eco.PROFILS_RENDU), default="thumbnail",
+                        help="profil de rendu des figures")
+    parser.add_argument('--sans-rendu', action='store_true', help="ne mesure pas le rendu des figures")
+    parser.add_argument('--repeat', type=int, default=3, help="répétitions par mesure")
+    parser.add_argument('--historique', default=HISTORIQUE_DEFAUT, help="fichier d'historique JSON Lines")
+    parser.add_argument('--seuil', type=float, default=0.20,
+                        help="ralentissement relatif signalé comme régression (0.20 par défaut)")
+    parser.add_argument('--verifier', action='store_true', help="code retour 1 en cas de régression")
+    args = parser.parse_args()
+
+    if not args.sans_rendu:
+        Eco.use_headless_backend()
+    resultats = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_communes in args.communes:
+            for resolution in args.resolutions:
+                resultats += bench_communes(n_communes, resolution, args.repeat, args.formats,
+                                            not args.sans_rendu, args.profile, tmp)
+    for n_replicats in args.replicats:
+        resultats += bench_ensemble(n_replicats, args.repeat)
+
+    historique = charger_historique(args.historique)
+    regressions = comparer(resultats, historique[-1] if historique else None, args.seuil)
+
+    execution = {
+        "date": datetime.now().isoformat(timespec='seconds'),
+        "commit": commit_courant(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processeurs": os.cpu_count(),
+        "resultats": resultats,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.historique)), exist_ok=True)
+    with open(args.historique, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(execution, ensure_ascii=False) + "\n")
+    print(f"📋 Historique: {args.historique}")
+
+    if regressions:
+        print(f"⚠️ {len(regressions)} régression(s) au-delà de {args.seuil:.0%}")
+        if args.verifier:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
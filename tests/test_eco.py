@@ -0,0 +1,140 @@
+"""Tests de non-régression: déterminisme, cache et totaux des résolutions infra-annuelles"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Eco  # noqa: E402
+
+
+def generer(commune="Dakar", pays="Sénégal", seed=42, **options):
+    return Eco.AfriqueCommuneFinanceAnalyzer(commune, pays, seed=seed, **options).generate_financial_data()
+
+
+# Déterminisme
+
+def test_meme_graine_memes_donnees():
+    pd.testing.assert_frame_equal(generer(seed=7), generer(seed=7))
+
+
+def test_graines_differentes_donnees_differentes():
+    assert not generer(seed=7).equals(generer(seed=8))
+
+
+def test_sous_flux_distincts_par_commune():
+    keys = {Eco.stream_key(f"{pays}/{commune}") for pays, commune in Eco.select_communes()}
+    assert len(keys) == len(Eco.select_communes())
+
+
+def test_ensemble_par_morceaux_identique():
+    analyzer = Eco.AfriqueCommuneFinanceAnalyzer("Lagos", "Nigeria", seed=3)
+    _, paths = analyzer.simulate_ensemble(2500)
+    chunks = np.concatenate([chunk for _, _, chunk in analyzer.iter_ensemble_chunks(2500, chunk_size=1000)])
+    np.testing.assert_array_equal(paths, chunks)
+
+
+def test_ensemble_statistics_independant_des_processus():
+    un = Eco.ensemble_statistics("Sénégal", "Dakar", 2048, seed=1, workers=1)
+    deux = Eco.ensemble_statistics("Sénégal", "Dakar", 2048, seed=1, workers=2)
+    np.testing.assert_allclose(un.mean, deux.mean)
+    np.testing.assert_array_equal(un.counts, deux.counts)
+
+
+def test_run_batch_independant_des_processus(tmp_path):
+    selection = [("Sénégal", "Dakar"), ("Nigeria", "Lagos")]
+    for workers in (1, 2):
+        Eco.run_batch(selection, workers=workers, output_dir=str(tmp_path / str(workers)), seed=5, render=False)
+    for pays, commune in selection:
+        name = os.path.basename(Eco.AfriqueCommuneFinanceAnalyzer(commune, pays).data_path())
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "1" / name), pd.read_csv(tmp_path / "2" / name))
+
+
+# Cache
+
+def test_cache_relit_les_memes_donnees(tmp_path, capsys):
+    cache = Eco.ResultCache(str(tmp_path))
+    premier = generer(seed=11, cache=cache)
+    second = generer(seed=11, cache=cache)
+    assert "♻️ Données en cache" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(premier, second)
+
+
+def test_cache_ignore_sans_graine(tmp_path):
+    cache = Eco.ResultCache(str(tmp_path))
+    generer(seed=None, cache=cache)
+    assert cache.size() == 0
+
+
+def test_cache_taille_tenue_a_jour_et_eviction(tmp_path):
+    frame = pd.DataFrame({"x": np.arange(2000, dtype=float)})
+    cache = Eco.ResultCache(str(tmp_path), max_bytes=100_000)
+    for i in range(20):
+        cache.put_frame(Eco.ResultCache.key(i=i), frame, commune=str(i))
+    assert cache._total == cache.size() <= 100_000
+    assert cache.get_frame(Eco.ResultCache.key(i=19)) is not None
+    assert cache.get_frame(Eco.ResultCache.key(i=0)) is None
+
+
+def test_cache_entree_corrompue_est_absente(tmp_path):
+    cache = Eco.ResultCache(str(tmp_path))
+    key = Eco.ResultCache.key(test="corrompu")
+    cache.put_frame(key, pd.DataFrame({"x": range(1000)}))
+    path = os.path.join(str(tmp_path), f"{key}.pkl")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data) // 2])
+    assert cache.get_frame(key) is None
+    assert not os.path.exists(path)
+
+
+def test_cache_invalidation_par_commune(tmp_path):
+    cache = Eco.ResultCache(str(tmp_path))
+    generer("Dakar", "Sénégal", seed=1, cache=cache)
+    generer("Lagos", "Nigeria", seed=1, cache=cache)
+    assert cache.invalidate(commune="Dakar") == 1
+    remaining = [name for name in os.listdir(str(tmp_path)) if name.endswith(".json")]
+    with open(os.path.join(str(tmp_path), remaining[0]), encoding="utf-8") as f:
+        assert json.load(f)["commune"] == "Lagos"
+
+
+def test_previsions_en_cache_par_commune(tmp_path):
+    pytest.importorskip("statsmodels")
+    df = generer("Thiès", "Sénégal", seed=1)
+    panel = pd.concat([df.assign(pays="Sénégal", commune="Thiès"), df.assign(pays="Sénégal", commune="Kaolack")])
+    cache = Eco.ResultCache(str(tmp_path))
+    for _ in range(2):
+        forecast = Eco.forecast_panel(panel, horizon=2, indicators=["Population"], workers=1, cache=cache)
+        assert sorted(forecast["commune"].unique()) == ["Kaolack", "Thiès"]
+
+
+# Résolutions infra-annuelles
+
+@pytest.mark.parametrize("resolution", ["trimestriel", "mensuel"])
+def test_periodes_somment_au_total_annuel(resolution):
+    analyzer = Eco.AfriqueCommuneFinanceAnalyzer("Dakar", "Sénégal", seed=2)
+    annuel = analyzer.generate_financial_data()
+    infra = analyzer.to_resolution(annuel, resolution)
+    assert len(infra) == len(annuel) * Eco.RESOLUTIONS[resolution]
+    sommes = infra.groupby("Annee")[Eco.COLONNES_FLUX].sum().reset_index(drop=True)
+    np.testing.assert_allclose(sommes.to_numpy(), annuel[Eco.COLONNES_FLUX].to_numpy(), rtol=1e-9)
+
+
+def test_reagregation_annuelle():
+    analyzer = Eco.AfriqueCommuneFinanceAnalyzer("Lagos", "Nigeria", seed=2)
+    annuel = analyzer.generate_financial_data()
+    retour = Eco.aggregate_annual(analyzer.to_resolution(annuel, "mensuel"))
+    np.testing.assert_allclose(retour[Eco.COLONNES_INDICATEURS].to_numpy(dtype=float),
+                               annuel[Eco.COLONNES_INDICATEURS].to_numpy(dtype=float), rtol=1e-9)
+
+
+def test_resolution_sans_effet_sur_les_donnees_annuelles():
+    analyzer = Eco.AfriqueCommuneFinanceAnalyzer("Dakar", "Sénégal", seed=4)
+    avant = analyzer.generate_financial_data()
+    analyzer.generate_financial_data(resolution="mensuel")
+    pd.testing.assert_frame_equal(avant, analyzer.generate_financial_data())